@@ -0,0 +1,23 @@
+"""
+ASGI config for the NYCC challenge.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve with an ASGI server (e.g. `uvicorn backend.asgi:application`) to use the
+complaint event stream at api/complaints/stream/.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+application = get_asgi_application()
+
+if settings.WARM_CACHE_ON_STARTUP:
+    from complaint_app.utils.cache_utils import warm_cache_in_background
+    warm_cache_in_background()
@@ -2,6 +2,7 @@
 Django settings for NYCC challenge.
 
 Generated by 'django-admin startproject' using Django 2.0.7.
+For a JSON-only deployment of the complaint API see backend/settings_api.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.0/topics/settings/
@@ -50,14 +51,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # CORS first, so responses from every later middleware (redirects, 503s) get its headers
+    'corsheaders.middleware.CorsMiddleware',
+    'complaint_app.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'complaint_app.middleware.AdmissionControlMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -79,6 +83,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -88,9 +93,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Keep connections open between requests (seconds, 0 closes after every
+        # request) and check them before reuse so a dropped connection is replaced.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds to wait for a lock before raising "database is locked"
+            'timeout': 20,
+        },
     }
 }
 
+# PRAGMA profile applied to each SQLite connection, see complaint_app/utils/sqlite_utils.py.
+# 'production' enables WAL, mmap, a larger page cache, synchronous=NORMAL and in-memory temp tables.
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+
+# Read replicas: comma-separated database names (SQLite paths) in DATABASE_REPLICAS,
+# configured like 'default' and exposed as aliases replica1, replica2, ...
+# Leave it unset for the test suite: a replica mirrors 'default' under test, and a
+# mirror does not see the uncommitted rows of a TestCase (the replica tests set up
+# their own aliases, see backend/tests/test_db_routers.py).
+DATABASE_REPLICA_ALIASES = []
+for index, replica_name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': replica_name.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICA_ALIASES.append(alias)
+
+# Models whose reads may be served by a replica, see complaint_app.db_routers
+DATABASE_REPLICA_MODELS = [
+    'complaint_app.complaint',
+    'complaint_app.complaintaggregate',
+    'complaint_app.changecounter',
+    'complaint_app.complainttombstone',
+    'complaint_app.archivedcomplaint',
+]
+DATABASE_ROUTERS = ['complaint_app.db_routers.ReadReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
@@ -140,5 +178,80 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',      
         'rest_framework.renderers.BrowsableAPIRenderer',
-    )
-}
\ No newline at end of file
+    ),
+    # Per-user request rates, answered with 429 and Retry-After once exceeded.
+    # Views set throttle_scope 'heavy' (full complaint lists, exports) or 'light'
+    # (summary, heatmap, top complaints). Counts live in the default cache, so they
+    # are per process unless CACHES points at a shared backend.
+    'DEFAULT_THROTTLE_CLASSES': (
+        'rest_framework.throttling.UserRateThrottle',
+        'rest_framework.throttling.ScopedRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '3000/hour',
+        'heavy': '60/minute',
+        'light': '600/minute',
+    }
+}
+
+# Background report jobs, executed by `python manage.py run_workers`
+REPORT_JOB_RESULT_DIR = os.path.join(BASE_DIR, 'job_results')
+REPORT_JOB_RESULT_TTL = 24 * 60 * 60  # seconds a finished result can be downloaded
+REPORT_JOB_MAX_ATTEMPTS = 3
+REPORT_JOB_RETRY_BACKOFF = 30  # seconds, multiplied by the attempt number
+REPORT_JOB_TIMEOUT = 60 * 60  # seconds a job may run before run_workers stops it
+REPORT_JOB_HEARTBEAT_TIMEOUT = 5 * 60  # seconds without a heartbeat before a running job is considered abandoned
+
+# Complaint event stream (api/complaints/stream/), served by backend.asgi
+SSE_HEARTBEAT_INTERVAL = 15  # seconds between keepalive comments on an idle stream
+SSE_RELAY_INTERVAL = 2  # seconds between checks for complaints written by other processes
+SSE_QUEUE_SIZE = 100  # events buffered per connection before it is told to resync
+SSE_TICKET_MAX_AGE = 60  # seconds a stream ticket from api/complaints/streamTicket/ can open a stream
+
+# Closed complaints older than this are moved to the archive table by `manage.py archive_complaints`
+ARCHIVE_HORIZON_DAYS = 2 * 365
+
+# Request profiling, see complaint_app.middleware.RequestProfilingMiddleware.
+# Disabled, the middleware is dropped at startup. Enabled, it profiles
+# REQUEST_PROFILING_SAMPLE_RATE of requests (0.0 - 1.0) and any request whose
+# REQUEST_PROFILING_HEADER holds a token from `manage.py profile_summary --issue-token`.
+REQUEST_PROFILING_ENABLED = os.environ.get('REQUEST_PROFILING', '').lower() in ('1', 'true')
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 0))
+REQUEST_PROFILING_HEADER = 'X-Profile-Token'
+REQUEST_PROFILING_TOKEN_MAX_AGE = 60 * 60  # seconds a profiling token stays valid
+REQUEST_PROFILING_DIR = os.environ.get('REQUEST_PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+REQUEST_PROFILING_MAX_FILES = 500  # oldest dumps are deleted beyond this
+
+# Admission control for heavy views, see complaint_app.middleware.AdmissionControlMiddleware
+ADMISSION_HEAVY_CONCURRENCY = int(os.environ.get('ADMISSION_HEAVY_CONCURRENCY', 4))  # per worker process
+ADMISSION_QUEUE_TIMEOUT = 0.5  # seconds a heavy request may wait for a slot before a 503
+ADMISSION_RETRY_AFTER = 2  # seconds, sent as Retry-After on that 503
+
+# Caches. 'complaints' holds the per-district dashboard results (summary and top complaint
+# types) keyed by change sequence, see complaint_app/utils/cache_utils.py.
+# The in-memory default lives inside each worker process: it is warmed per worker with
+# WARM_CACHE_ON_STARTUP, while `manage.py warm_cache` (and populate_db --warm-cache)
+# refuse to run against it, as a command's process exits with what it warmed. Point
+# COMPLAINT_CACHE_BACKEND/LOCATION at a shared backend (e.g.
+# django.core.cache.backends.filebased.FileBasedCache and a directory) to warm every
+# worker at once.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'complaints': {
+        'BACKEND': os.environ.get('COMPLAINT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('COMPLAINT_CACHE_LOCATION', 'complaints'),
+        'TIMEOUT': 60 * 60,
+        # 51 districts x 2 modes x 5 results (with COMPLAINT_CACHE_LISTS), with room for a previous version
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+COMPLAINT_CACHE_ALIAS = 'complaints'
+# Also cache the default complaint lists (all/open/closed). Each district then stores six
+# full serialized copies of its complaints, all/open/closed in normal and constituent
+# mode, held by every worker when the cache is in-memory.
+COMPLAINT_CACHE_LISTS = os.environ.get('COMPLAINT_CACHE_LISTS', '').lower() in ('1', 'true')
+WARM_CACHE_WORKERS = 8  # threads used by warm_cache and the startup hook
+# Warm the complaint cache on a background thread when a web worker starts
+WARM_CACHE_ON_STARTUP = os.environ.get('WARM_CACHE_ON_STARTUP', '').lower() in ('1', 'true')
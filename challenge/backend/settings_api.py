@@ -0,0 +1,44 @@
+"""
+API-only settings profile for the NYCC challenge.
+
+Everything in backend/settings.py, minus what a token-authenticated JSON API never
+uses: the admin, sessions, messages, static files, templates, the CSRF, session,
+auth, messages and clickjacking middleware, and the browsable API. Fewer apps and
+middleware mean a faster worker start and less work per request.
+
+Select it with DJANGO_SETTINGS_MODULE=backend.settings_api (or --settings=backend.settings_api).
+It uses the same database; the admin and session tables are simply left alone.
+The test suite runs against backend.settings, which includes the admin; test_settings_api
+boots this profile in a subprocess.
+Compare it with the full profile using benchmarks/settings_profiles.py.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'complaint_app',
+    'corsheaders',
+]
+
+# DRF authenticates each request by token itself (and sets request.user), so the
+# session and auth middleware have nothing to do, and token auth needs no CSRF check
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'complaint_app.middleware.RequestProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'complaint_app.middleware.AdmissionControlMiddleware',
+]
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ),
+}
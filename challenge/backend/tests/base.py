@@ -0,0 +1,40 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from complaint_app.models import UserProfile
+
+class SignedInTestCase(TestCase):
+    """
+    Signs in jdoe, the council member for district 1, before each test.
+    The cache is cleared on both ends because the login and API throttles count
+    requests there, and user ids restart in every test.
+    """
+    username = "jdoe"
+    password = "doe-1"
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            username=self.username,
+            password=self.password,
+            first_name="John",
+            last_name="Doe"
+        )
+        self.profile = UserProfile.objects.create(
+            user=self.user,
+            full_name="John Doe",
+            district="1",
+            borough="Manhattan"
+        )
+
+        self.client = APIClient()
+        response = self.client.post('/login/', {
+            'username': self.username,
+            'password': self.password
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "Login should succeed")
+        self.token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
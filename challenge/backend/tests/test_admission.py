@@ -0,0 +1,69 @@
+from unittest import mock
+from django.test import TestCase, RequestFactory, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.middleware import AdmissionControlMiddleware
+from complaint_app.views import ComplaintViewSet, SummaryViewSet
+
+heavy_view = ComplaintViewSet.as_view({'get': 'list'})
+light_view = SummaryViewSet.as_view({'get': 'list'})
+
+@override_settings(ADMISSION_HEAVY_CONCURRENCY=1, ADMISSION_QUEUE_TIMEOUT=0, ADMISSION_RETRY_AFTER=3)
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.rejected = []
+
+    def admit(self, view):
+        return self.middleware.process_view(self.factory.get('/'), view, (), {})
+
+    def test_heavy_requests_are_capped_and_light_ones_pass(self):
+        def get_response(request):
+            # While this heavy request holds the only slot
+            self.assertIsNone(self.middleware.process_view(request, heavy_view, (), {}))
+            self.rejected.append(self.admit(heavy_view))
+            self.assertIsNone(self.admit(light_view), "Light requests should skip admission")
+            return HttpResponse("ok")
+
+        self.middleware = AdmissionControlMiddleware(get_response)
+        self.middleware(self.factory.get('/'))
+        response = self.rejected[0]
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE,
+            "A heavy request beyond the cap should be turned away")
+        self.assertEqual(response['Retry-After'], "3")
+
+        self.assertIsNone(self.admit(heavy_view), "The slot should be released after the response")
+
+    def test_streaming_response_holds_slot_until_closed(self):
+        def get_response(request):
+            self.middleware.process_view(request, heavy_view, (), {})
+            return StreamingHttpResponse(iter(["a", "b"]))
+
+        self.middleware = AdmissionControlMiddleware(get_response)
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(self.admit(heavy_view).status_code, status.HTTP_503_SERVICE_UNAVAILABLE,
+            "The slot should be held while the body is streamed")
+        response.close()
+        self.assertIsNone(self.admit(heavy_view), "Closing the response should release the slot")
+
+class ThrottleTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+
+    @mock.patch.dict(ScopedRateThrottle.THROTTLE_RATES, {'heavy': '2/minute'})
+    def test_heavy_scope_rate(self):
+        for attempt in range(2):
+            response = self.client.get('/api/complaints/allComplaints/', HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, f"Request {attempt} is within the rate")
+
+        for endpoint in ['allComplaints', 'openCases', 'constituentComplaints']:
+            with self.subTest(endpoint):
+                response = self.client.get(f'/api/complaints/{endpoint}/', HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS,
+                    "Heavy endpoints share the exhausted rate")
+                self.assertIn('Retry-After', response)
+
+        response = self.client.get('/api/complaints/summary/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "Light endpoints have their own rate")
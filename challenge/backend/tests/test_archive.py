@@ -0,0 +1,103 @@
+from io import StringIO
+from datetime import date
+from django.test import override_settings
+from django.core.management import call_command
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint, ArchivedComplaint, ComplaintTombstone
+from complaint_app.utils.archive_utils import archive_batch, get_archive_high_water_mark
+from complaint_app.utils.summary_utils import get_district_summary
+
+class ArchiveTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        Complaint.objects.create(
+            unique_key="old_closed",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2016, 3, 1),
+            closedate=date(2016, 4, 1),
+            complaint_type="Noise"
+        )
+        Complaint.objects.create(
+            unique_key="old_open",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2016, 3, 1),
+            complaint_type="Noise"
+        )
+        Complaint.objects.create(
+            unique_key="recent_closed",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            closedate=date(2024, 1, 15),
+            complaint_type="Traffic"
+        )
+
+    def keys(self, response):
+        return sorted(complaint['unique_key'] for complaint in response.json())
+
+    def test_archive_moves_only_old_closed_complaints(self):
+        self.assertEqual(archive_batch(date(2020, 1, 1), batch_size=10), 1,
+            "Only the complaint closed before the cutoff should move")
+        self.assertEqual(archive_batch(date(2020, 1, 1), batch_size=10), 0,
+            "Nothing should be left to archive")
+        self.assertEqual(list(ArchivedComplaint.objects.values_list('unique_key', flat=True)), ['old_closed'])
+        self.assertFalse(Complaint.objects.filter(unique_key='old_closed').exists(),
+            "Archived complaint should leave the hot table")
+        self.assertFalse(ComplaintTombstone.objects.exists(),
+            "Archiving is not a deletion for delta sync clients")
+        self.assertEqual(get_archive_high_water_mark(), date(2016, 4, 1))
+
+    def test_archive_reads_from_the_primary(self):
+        # Any read routed to a replica would fail on this alias
+        with override_settings(DATABASE_REPLICA_ALIASES=['missing_replica']):
+            self.assertEqual(archive_batch(date(2020, 1, 1), batch_size=10), 1)
+            self.assertEqual(archive_batch(date(2020, 1, 1), batch_size=10), 0)
+        self.assertEqual(ArchivedComplaint.objects.count(), 1, "Each complaint should be archived once")
+
+    def test_archive_keeps_summary_counts(self):
+        before = get_district_summary('account', 'NYCC01')
+        archive_batch(date(2020, 1, 1), batch_size=10)
+        self.assertEqual(get_district_summary('account', 'NYCC01'), before,
+            "Archived complaints still count towards the district totals")
+
+    def test_top_complaints_match_summary_after_archiving(self):
+        archive_batch(date(2020, 1, 1), batch_size=10)
+        summary = self.client.get('/api/complaints/summary/', HTTP_ACCEPT='application/json').json()
+        top = self.client.get('/api/complaints/topComplaints/', HTTP_ACCEPT='application/json').json()
+        self.assertEqual(top, summary['top_complaints'],
+            "Both endpoints should count archived complaints")
+        self.assertEqual(top[0], {'complaint_type': 'Noise', 'count': 2})
+
+    def test_command_batches_and_dry_run(self):
+        out = StringIO()
+        call_command('archive_complaints', '--older-than-days=3000', '--dry-run', stdout=out)
+        self.assertIn("1 complaint(s)", out.getvalue())
+        self.assertFalse(ArchivedComplaint.objects.exists(), "Dry run should not move anything")
+
+        call_command('archive_complaints', '--older-than-days=3000', '--batch-size=1', stdout=StringIO())
+        self.assertEqual(ArchivedComplaint.objects.count(), 1)
+
+    def test_lists_union_archive_only_when_asked(self):
+        archive_batch(date(2020, 1, 1), batch_size=10)
+        cases = [
+            ('allComplaints/', ['old_open', 'recent_closed']),
+            ('allComplaints/?include_archive=true', ['old_closed', 'old_open', 'recent_closed']),
+            ('allComplaints/?opened_before=2017-01-01', ['old_closed', 'old_open']),
+            ('allComplaints/?opened_after=2020-01-01', ['recent_closed']),
+            ('closedCases/?opened_after=2015-01-01', ['old_closed', 'recent_closed']),
+            ('openCases/?include_archive=true', ['old_open']),
+            ('constituentComplaints/?include_archive=true&fields=unique_key', ['old_closed', 'old_open', 'recent_closed']),
+        ]
+        for path, expected in cases:
+            with self.subTest(path):
+                response = self.client.get(f'/api/complaints/{path}', HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK, "Request should succeed")
+                self.assertEqual(self.keys(response), expected)
+
+    def test_invalid_date_range(self):
+        response = self.client.get('/api/complaints/allComplaints/?opened_after=last-year', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST,
+            "Malformed dates should be rejected")
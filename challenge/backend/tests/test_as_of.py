@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.test import override_settings
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint, ChangeCounter
+from complaint_app.utils.archive_utils import archive_batch
+from complaint_app.utils.interval_utils import open_interval_index
+from complaint_app.utils.query_utils import open_as_of_filter
+from complaint_app.utils.change_utils import CACHE_EPOCH_COUNTER
+
+class OpenAsOfTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        # The index lives for the whole process; start each test from this test's database
+        open_interval_index.reset()
+        intervals = [
+            ("a", date(2016, 1, 1), date(2016, 3, 1)),
+            ("b", date(2016, 2, 1), None),
+            ("c", date(2016, 2, 15), date(2016, 2, 20)),
+            ("d", date(2024, 1, 1), date(2024, 1, 15)),
+            ("no_open_date", None, date(2016, 2, 10)),
+        ]
+        for unique_key, opendate, closedate in intervals:
+            Complaint.objects.create(
+                unique_key=unique_key,
+                account="NYCC01",
+                council_dist="NYCC02",
+                opendate=opendate,
+                closedate=closedate,
+                complaint_type="Noise"
+            )
+
+    def assertIndexMatchesQuery(self, filter_field='account', district='NYCC01'):
+        days = [date(2015, 12, 31) + timedelta(days=offset) for offset in range(0, 3000, 7)]
+        counts = open_interval_index.open_counts(filter_field, district, days)
+        for day, count in zip(days, counts):
+            expected = Complaint.objects.filter(open_as_of_filter(day), **{filter_field: district}).count()
+            self.assertEqual(count, {'date': day, 'open': expected}, f"Open count on {day} should match the table")
+
+    def test_counts_match_table(self):
+        self.assertIndexMatchesQuery()
+        self.assertIndexMatchesQuery('council_dist', 'NYCC02')
+        counts = open_interval_index.open_counts('account', 'NYCC01', [date(2016, 2, 16), date(2016, 2, 20), date(2016, 3, 1)])
+        self.assertEqual([count['open'] for count in counts], [3, 2, 1],
+            "A complaint is open from its open date until the day before it closes")
+
+    def test_index_follows_changes(self):
+        self.assertIndexMatchesQuery()
+        Complaint.objects.create(unique_key="e", account="NYCC01", opendate=date(2016, 2, 1))
+        closed = Complaint.objects.get(unique_key="b")
+        closed.closedate = date(2016, 6, 1)
+        closed.save()
+        moved = Complaint.objects.get(unique_key="c")
+        moved.account = "NYCC03"
+        moved.save()
+        Complaint.objects.get(unique_key="a").delete()
+        with self.subTest("Created, closed, moved and deleted complaints"):
+            self.assertIndexMatchesQuery()
+            self.assertIndexMatchesQuery('account', 'NYCC03')
+
+    def test_archived_complaints_stay_counted(self):
+        before = open_interval_index.open_counts('account', 'NYCC01', [date(2016, 2, 16)])
+        archive_batch(date(2020, 1, 1), batch_size=10)
+        self.assertEqual(open_interval_index.open_counts('account', 'NYCC01', [date(2016, 2, 16)]), before,
+            "Incremental index should keep archived complaints")
+        open_interval_index.reset()
+        self.assertEqual(open_interval_index.open_counts('account', 'NYCC01', [date(2016, 2, 16)]), before,
+            "Rebuilt index should read the archive too")
+
+    def test_duplicate_and_blank_unique_keys(self):
+        day = date(2016, 1, 10)
+        for unique_key, closedate in [("dup", date(2016, 3, 1)), ("dup", date(2016, 3, 1)),
+                                      ("", date(2016, 1, 20)), ("", date(2016, 1, 20))]:
+            Complaint.objects.create(unique_key=unique_key, account="NYCC01", opendate=date(2016, 1, 1),
+                closedate=closedate)
+        with self.subTest("Complaints sharing a key are counted separately"):
+            self.assertIndexMatchesQuery()
+
+        # One blank-keyed complaint archived, the other deleted: the tombstone for ""
+        # must not take the archived one with it
+        self.assertEqual(archive_batch(date(2016, 1, 25), batch_size=1), 1)
+        Complaint.objects.get(unique_key="").delete()
+        Complaint.objects.filter(unique_key="dup").first().delete()
+        counts = open_interval_index.open_counts('account', 'NYCC01', [day])
+        self.assertEqual(counts[0]['open'], 3, "'a', the remaining 'dup' and the archived blank complaint")
+        open_interval_index.reset()
+        self.assertEqual(open_interval_index.open_counts('account', 'NYCC01', [day]), counts,
+            "Incremental and rebuilt index should agree")
+
+        response = self.client.get(f'/api/complaints/openCases/?as_of={day}', HTTP_ACCEPT='application/json')
+        summary = self.client.get(f'/api/complaints/summary/?as_of={day}', HTTP_ACCEPT='application/json')
+        self.assertEqual(summary.json()['open_as_of'][0]['open'], len(response.json()),
+            "Summary count should match the listed cases")
+
+    def test_index_is_pinned_to_one_database(self):
+        day = date(2016, 2, 15)
+        open_interval_index.open_counts('account', 'NYCC01', [day])
+        with mock.patch.object(open_interval_index, '_build', wraps=open_interval_index._build) as build:
+            # Any read routed to a replica would fail on this alias
+            with override_settings(DATABASE_REPLICA_ALIASES=['missing_replica']):
+                for _ in range(3):
+                    Complaint.objects.create(unique_key="later", account="NYCC01", opendate=date(2016, 1, 1))
+                    open_interval_index.open_counts('account', 'NYCC01', [day])
+            self.assertEqual(build.call_count, 0, "New changes should be applied, not rebuilt")
+
+            ChangeCounter.objects.filter(name=CACHE_EPOCH_COUNTER).update(value=0)
+            open_interval_index.open_counts('account', 'NYCC01', [day])
+            self.assertEqual(build.call_count, 1, "A new database epoch should rebuild the index")
+        self.assertIndexMatchesQuery()
+
+    def test_summary_as_of(self):
+        response = self.client.get('/api/complaints/summary/?as_of=2016-02-16,2024-01-10', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "Request should succeed")
+        self.assertEqual(response.json()['open_as_of'], [
+            {'date': '2016-02-16', 'open': 3},
+            {'date': '2024-01-10', 'open': 2},
+        ])
+
+    def test_open_cases_as_of(self):
+        archive_batch(date(2020, 1, 1), batch_size=10)
+        response = self.client.get('/api/complaints/openCases/?as_of=2016-02-16', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "Request should succeed")
+        self.assertEqual(sorted(complaint['unique_key'] for complaint in response.json()), ['a', 'b', 'c'],
+            "Cases open on the day should include archived ones")
+
+    def test_invalid_as_of(self):
+        for path in ['openCases/?as_of=2016-02-16,2016-02-17', 'openCases/?as_of=yesterday', 'summary/?as_of=']:
+            with self.subTest(path):
+                response = self.client.get(f'/api/complaints/{path}', HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST,
+                    "Malformed as_of should be rejected")
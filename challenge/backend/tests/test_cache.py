@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from datetime import date
+from django.test import TransactionTestCase, override_settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.conf import settings
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint
+from complaint_app.utils.archive_utils import archive_batch
+from complaint_app.utils.heatmap_utils import rebuild_complaint_aggregates
+from complaint_app.utils.cache_utils import (
+    DISTRICT_RESULTS, DISTRICT_LIST_RESULTS, district_cache_key, get_cache_version, get_council_districts, warm_district
+)
+
+class ComplaintCacheTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        Complaint.objects.create(
+            unique_key="old_closed",
+            account="NYCC01",
+            council_dist="NYCC02",
+            opendate=date(2016, 3, 1),
+            closedate=date(2016, 4, 1),
+            complaint_type="Noise"
+        )
+
+    def keys(self, endpoint):
+        response = self.client.get(f'/api/complaints/{endpoint}/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "Request should succeed")
+        return sorted(complaint['unique_key'] for complaint in response.json())
+
+    @override_settings(COMPLAINT_CACHE_LISTS=True)
+    def test_writes_and_archiving_refresh_cached_lists(self):
+        self.assertEqual(self.keys('allComplaints'), ['old_closed'])
+        Complaint.objects.create(unique_key="new_open", account="NYCC01", opendate=date(2024, 1, 1))
+        self.assertEqual(self.keys('allComplaints'), ['new_open', 'old_closed'],
+            "A new complaint should move the list to a fresh cache key")
+        self.assertEqual(self.keys('openCases'), ['new_open'])
+        archive_batch(date(2020, 1, 1), batch_size=10)
+        self.assertEqual(self.keys('allComplaints'), ['new_open'],
+            "Archiving should move the list to a fresh cache key")
+
+    def test_aggregate_rebuild_refreshes_cached_summary(self):
+        response = self.client.get('/api/complaints/summary/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['total'], 1)
+        # Like populate_db: bulk_create skips the signals, the rebuild catches up
+        Complaint.objects.bulk_create([
+            Complaint(unique_key=f"bulk_{i}", account="NYCC01", opendate=date(2024, 1, 1)) for i in range(2)
+        ])
+        rebuild_complaint_aggregates()
+        response = self.client.get('/api/complaints/summary/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['total'], 3, "A rebuild should move the summary to a fresh cache key")
+
+    @override_settings(COMPLAINT_CACHE_LISTS=True)
+    def test_warmed_results_are_served_without_recomputing(self):
+        warm_district('NYCC01')
+        cache = caches[settings.COMPLAINT_CACHE_ALIAS]
+        version = get_cache_version()
+        for filter_field in ('account', 'council_dist'):
+            for kind in [*DISTRICT_RESULTS, *DISTRICT_LIST_RESULTS]:
+                with self.subTest(f"{kind} by {filter_field}"):
+                    self.assertIsNotNone(cache.get(district_cache_key(kind, filter_field, 'NYCC01', version)),
+                        "Warming should cache every result in both modes")
+
+        failing = {kind: mock.Mock(side_effect=AssertionError("recomputed")) for kind in DISTRICT_RESULTS}
+        failing_lists = {kind: mock.Mock(side_effect=AssertionError("recomputed")) for kind in DISTRICT_LIST_RESULTS}
+        with mock.patch.dict(DISTRICT_RESULTS, failing), mock.patch.dict(DISTRICT_LIST_RESULTS, failing_lists):
+            for endpoint in ['allComplaints', 'openCases', 'closedCases', 'topComplaints', 'summary']:
+                with self.subTest(endpoint):
+                    response = self.client.get(f'/api/complaints/{endpoint}/', HTTP_ACCEPT='application/json')
+                    self.assertEqual(response.status_code, status.HTTP_200_OK, "Should be served from the cache")
+
+    def test_lists_are_not_cached_by_default(self):
+        warm_district('NYCC01')
+        cache = caches[settings.COMPLAINT_CACHE_ALIAS]
+        version = get_cache_version()
+        for kind in DISTRICT_LIST_RESULTS:
+            with self.subTest(kind):
+                self.assertIsNone(cache.get(district_cache_key(kind, 'account', 'NYCC01', version)))
+        self.assertEqual(self.keys('allComplaints'), ['old_closed'])
+
+    def test_council_districts(self):
+        districts = get_council_districts()
+        self.assertEqual(len(districts), 51)
+        self.assertEqual(districts[0], 'NYCC01')
+
+class WarmCacheCommandTests(TransactionTestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        caches_override = override_settings(CACHES={
+            **settings.CACHES,
+            'complaints': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+        })
+        caches_override.enable()
+        self.addCleanup(caches_override.disable)
+
+    def test_reports_each_district(self):
+        Complaint.objects.create(unique_key="open_case", account="NYCC01", council_dist="NYCC01", opendate=date(2024, 1, 1))
+        out = StringIO()
+        call_command('warm_cache', '--district=NYCC01', '--district=NYCC02', '--workers=2', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(sorted(line.split()[0] for line in lines[:2]), ['NYCC01', 'NYCC02'],
+            "Each district should report its warming time")
+        self.assertIn("Warmed 2 district(s)", lines[-1])
+
+    def test_refuses_process_local_cache(self):
+        with override_settings(CACHES={**settings.CACHES, 'complaints': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'complaints'
+        }}):
+            with self.assertRaisesMessage(CommandError, "lives inside each process"):
+                call_command('warm_cache', '--district=NYCC01', stdout=StringIO())
+            with self.assertRaisesMessage(CommandError, "lives inside each process"):
+                call_command('populate_db', '--warm-cache', stdout=StringIO())
+        self.assertFalse(Complaint.objects.exists(), "populate_db should fail before loading anything")
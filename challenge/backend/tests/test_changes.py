@@ -0,0 +1,116 @@
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint
+from complaint_app.utils.change_utils import reserve_change_seqs
+from datetime import date
+
+class DeltaSyncTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        self.open_case = Complaint.objects.create(
+            unique_key="open_case",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise"
+        )
+        self.closed_case = Complaint.objects.create(
+            unique_key="closed_case",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            closedate=date(2024, 1, 15),
+            complaint_type="Traffic"
+        )
+        Complaint.objects.create(
+            unique_key="different_district",
+            account="NYCC02",
+            opendate=date(2024, 1, 1),
+            complaint_type="Health"
+        )
+
+    def poll(self, endpoint, since):
+        response = self.client.get(f'/api/complaints/{endpoint}/?since={since}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK,
+            "Request should succeed")
+        return response.data
+
+    def changed_keys(self, data):
+        return [c['unique_key'] for c in data['changed']]
+
+    def test_initial_sync(self):
+        data = self.poll('allComplaints', 0)
+        self.assertEqual(self.changed_keys(data), ['open_case', 'closed_case'],
+            "since=0 should return the whole district")
+        self.assertEqual(data['removed'], [])
+
+        data = self.poll('allComplaints', data['cursor'])
+        self.assertEqual(data['changed'], [],
+            "Nothing changed since the last poll")
+
+    def test_inserts_and_updates(self):
+        cursor = self.poll('allComplaints', 0)['cursor']
+
+        Complaint.objects.create(unique_key="new_case", account="NYCC01", opendate=date(2024, 2, 1))
+        self.closed_case.descriptor = "Signal"
+        self.closed_case.save()
+        Complaint.objects.create(unique_key="new_other_district", account="NYCC02")
+
+        data = self.poll('allComplaints', cursor)
+        self.assertEqual(self.changed_keys(data), ['new_case', 'closed_case'],
+            "Only rows written since the cursor, in write order")
+        self.assertEqual(data['changed'][1]['descriptor'], 'Signal')
+
+    def test_deletes_return_tombstones(self):
+        cursor = self.poll('allComplaints', 0)['cursor']
+        self.open_case.delete()
+
+        data = self.poll('allComplaints', cursor)
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['removed'], ['open_case'])
+
+    def test_complaint_leaving_a_filtered_list(self):
+        cursor = self.poll('openCases', 0)['cursor']
+
+        with self.subTest("Closing a case removes it from openCases"):
+            self.open_case.closedate = date(2024, 2, 1)
+            self.open_case.save()
+            data = self.poll('openCases', cursor)
+            self.assertEqual(data['changed'], [])
+            self.assertEqual(data['removed'], ['open_case'])
+
+        with self.subTest("... and adds it to closedCases"):
+            data = self.poll('closedCases', cursor)
+            self.assertEqual(self.changed_keys(data), ['open_case'])
+
+    def test_complaint_moving_district(self):
+        cursor = self.poll('allComplaints', 0)['cursor']
+        self.open_case.account = "NYCC02"
+        self.open_case.save()
+
+        data = self.poll('allComplaints', cursor)
+        self.assertEqual(data['removed'], ['open_case'],
+            "The district the complaint left should get a tombstone")
+
+        data = self.poll('constituentComplaints', cursor)
+        self.assertEqual(self.changed_keys(data), ['open_case'])
+        self.assertEqual(data['removed'], [],
+            "Its constituent district did not change")
+
+    def test_sequence_is_monotonic(self):
+        first = Complaint.objects.create(unique_key="first", account="NYCC01")
+        reserved = reserve_change_seqs(3)
+        second = Complaint.objects.create(unique_key="second", account="NYCC01")
+
+        self.assertEqual(list(reserved), [first.change_seq + 1, first.change_seq + 2, first.change_seq + 3])
+        self.assertEqual(second.change_seq, reserved[-1] + 1)
+        self.assertIsNotNone(second.updated_at)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/complaints/allComplaints/?since=yesterday')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_default_list_unchanged(self):
+        """Without since the list endpoints keep returning a plain list"""
+        response = self.client.get('/api/complaints/allComplaints/')
+        self.assertEqual([c['unique_key'] for c in response.data], ['open_case', 'closed_case'])
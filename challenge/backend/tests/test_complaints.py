@@ -1,28 +1,13 @@
-from django.test import TestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework import status
+from backend.tests.base import SignedInTestCase
 from complaint_app.models import UserProfile, Complaint
 from datetime import date
 
-class ComplaintEndpointTests(TestCase):
+class ComplaintEndpointTests(SignedInTestCase):
     def setUp(self):
-        self.username = "jdoe"
-        self.password = "doe-1"
-        self.user = User.objects.create_user(
-            username=self.username,
-            password=self.password,
-            first_name="John",
-            last_name="Doe"
-        )
-
-        self.profile = UserProfile.objects.create(
-            user=self.user,
-            full_name="John Doe",
-            district="1",
-            borough="Manhattan"
-        )
-
+        super().setUp()
         self.complaints = [
             Complaint.objects.create(
                 unique_key="open_with_date",
@@ -71,14 +56,6 @@ class ComplaintEndpointTests(TestCase):
             ),
         ]
 
-        self.client = APIClient()
-        response = self.client.post('/login/', {
-            'username': self.username,
-            'password': self.password
-        }, format='json')
-        self.token = response.data['token']
-        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
-
     def test_get_all_complaints(self):
         with self.subTest("Fetching all complaints for a district"):
             response = self.client.get('/api/complaints/allComplaints/')
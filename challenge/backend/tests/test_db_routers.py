@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from django.db import connections, router
+from rest_framework.test import APIClient
+from rest_framework import status
+from complaint_app.models import UserProfile, Complaint, ReportJob
+
+@override_settings(DATABASE_REPLICA_ALIASES=['replica1', 'replica2'])
+class ReadReplicaRouterTests(SimpleTestCase):
+    def test_complaint_reads_use_replicas(self):
+        """Complaint querysets should be read from one of the replicas"""
+        aliases = {Complaint.objects.filter(account="NYCC01").db for _ in range(50)}
+        self.assertTrue(aliases <= {'replica1', 'replica2'})
+        self.assertEqual(aliases, {'replica1', 'replica2'},
+            "Reads should be spread across all replicas")
+
+    def test_writes_use_primary(self):
+        """Writes, e.g. from populate_db, should always go to the primary"""
+        self.assertEqual(router.db_for_write(Complaint), 'default')
+
+    def test_other_models_use_primary(self):
+        """Auth, profiles and jobs need read-your-writes, so they stay on the primary"""
+        self.assertEqual(User.objects.all().db, 'default')
+        self.assertEqual(UserProfile.objects.all().db, 'default')
+        self.assertEqual(ReportJob.objects.all().db, 'default')
+
+    def test_migrations_skip_replicas(self):
+        self.assertTrue(router.allow_migrate('default', 'complaint_app'))
+        self.assertFalse(router.allow_migrate('replica1', 'complaint_app'))
+
+    @override_settings(DATABASE_REPLICA_ALIASES=[])
+    def test_no_replicas_configured(self):
+        """Without replicas everything is served by the primary"""
+        self.assertEqual(Complaint.objects.all().db, 'default')
+
+MIRROR_ALIASES = ['mirror1', 'mirror2']
+
+@override_settings(DATABASE_REPLICA_ALIASES=MIRROR_ALIASES)
+class ReplicaAliasTests(TransactionTestCase):
+    """
+    Runs against two replica aliases added for these tests as mirrors of the test
+    database: connections to the same database, so committed rows are visible on them.
+    """
+    # '__all__' is resolved in setUpClass, once the mirrors exist
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        default = connections['default'].settings_dict
+        for alias in MIRROR_ALIASES:
+            connections.settings[alias] = {**default, 'TEST': {**default['TEST'], 'MIRROR': 'default'}}
+        cls.addClassCleanup(cls.remove_mirror_aliases)
+        super().setUpClass()
+
+    @classmethod
+    def remove_mirror_aliases(cls):
+        for alias in MIRROR_ALIASES:
+            if hasattr(connections._connections, alias):
+                connections[alias].close()
+                delattr(connections._connections, alias)
+            del connections.settings[alias]
+
+    def test_endpoint_reads_through_replicas(self):
+        user = User.objects.create_user(username="jdoe", password="doe-1")
+        UserProfile.objects.create(user=user, full_name="John Doe", district="1", borough="Manhattan")
+        Complaint.objects.create(unique_key="replicated", account="NYCC01")
+
+        self.assertIn(Complaint.objects.all().db, settings.DATABASE_REPLICA_ALIASES)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/complaints/allComplaints/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['unique_key'] for c in response.data], ['replicated'])
+
+    def test_reads_spread_over_aliases(self):
+        """Every replica alias should serve reads of committed complaints"""
+        Complaint.objects.create(unique_key="replicated", account="NYCC01")
+        seen = set()
+        for _ in range(50):
+            queryset = Complaint.objects.filter(unique_key="replicated")
+            self.assertEqual(queryset.count(), 1, f"{queryset.db} should see the complaint")
+            seen.add(queryset.db)
+        self.assertEqual(seen, set(MIRROR_ALIASES))
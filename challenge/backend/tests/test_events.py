@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint
+from complaint_app.utils.change_utils import reserve_change_seqs
+from complaint_app.events import (ComplaintBroadcaster, ChangeFeedRelay, broadcaster, district_channel,
+    COMPLAINT_CREATED, COMPLAINT_CLOSED, COMPLAINT_UPDATED)
+from datetime import date
+
+class BroadcasterTests(SimpleTestCase):
+    def test_publish_from_another_thread(self):
+        """Test events published by sync code reach an asyncio subscriber"""
+        async def scenario():
+            events = ComplaintBroadcaster()
+            subscription = events.subscribe([district_channel('account', 'NYCC01')])
+            other = events.subscribe([district_channel('account', 'NYCC02')])
+
+            publisher = threading.Thread(target=events.publish, args=(
+                {district_channel('account', 'NYCC01')}, {'type': 'test'}))
+            publisher.start()
+            publisher.join()
+
+            self.assertEqual(await subscription.next_events(timeout=1), [{'type': 'test'}])
+            self.assertEqual(await other.next_events(timeout=0.05), [],
+                "Other districts should not receive the event")
+
+            events.unsubscribe(subscription)
+            events.unsubscribe(other)
+            self.assertFalse(events.has_subscribers())
+
+        asyncio.run(scenario())
+
+    def test_slow_subscriber_overflows(self):
+        async def scenario():
+            events = ComplaintBroadcaster()
+            subscription = events.subscribe(['account:NYCC01'], maxsize=2)
+            for i in range(3):
+                events.publish({'account:NYCC01'}, {'type': 'test', 'i': i})
+            await asyncio.sleep(0)
+            self.assertTrue(subscription.overflowed)
+            self.assertEqual(len(await subscription.next_events(timeout=1)), 2)
+
+        asyncio.run(scenario())
+
+class ComplaintStreamTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        response = self.client.post('/api/complaints/streamTicket/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, "A signed in user should get a ticket")
+        self.ticket = response.data['ticket']
+        self.complaint = Complaint.objects.create(
+            unique_key="open_case",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise"
+        )
+
+    async def read_event(self, content):
+        chunk = await asyncio.wait_for(anext(content), timeout=5)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        return fields['event'], json.loads(fields['data'])
+
+    async def test_stream_events(self):
+        response = await self.async_client.get(f'/api/complaints/stream/?ticket={self.ticket}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+
+        with self.subTest("The stream opens with the district summary"):
+            event, data = await self.read_event(content)
+            self.assertEqual(event, 'summary')
+            self.assertEqual(data['open'], 1)
+
+        with self.subTest("Creating a complaint pushes an event and a new summary"):
+            def create():
+                with self.captureOnCommitCallbacks(execute=True):
+                    Complaint.objects.create(unique_key="new_case", account="NYCC01", opendate=date(2024, 2, 1))
+            await sync_to_async(create)()
+
+            event, data = await self.read_event(content)
+            self.assertEqual(event, COMPLAINT_CREATED)
+            self.assertEqual(data['complaint']['unique_key'], 'new_case')
+            event, data = await self.read_event(content)
+            self.assertEqual(event, 'summary')
+            self.assertEqual(data['open'], 2)
+
+        with self.subTest("Closing a complaint pushes a closed event"):
+            def close():
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.complaint.closedate = date(2024, 2, 2)
+                    self.complaint.save()
+            await sync_to_async(close)()
+
+            event, data = await self.read_event(content)
+            self.assertEqual(event, COMPLAINT_CLOSED)
+            self.assertEqual(data['complaint']['unique_key'], 'open_case')
+            event, data = await self.read_event(content)
+            self.assertEqual((event, data['open'], data['closed']), ('summary', 1, 1))
+
+        with self.subTest("A client disconnect unsubscribes the stream"):
+            # The ASGI handler cancels the pending read when the client goes away
+            pending_read = asyncio.ensure_future(anext(content))
+            await asyncio.sleep(0.05)
+            pending_read.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await pending_read
+            self.assertFalse(broadcaster.has_subscribers())
+
+    async def test_stream_requires_valid_ticket(self):
+        for description, query in [
+            ("Invalid ticket", 'ticket=invalid'),
+            ("The API token does not belong in the URL", f'token={self.token}'),
+            ("An API token is not a ticket", f'ticket={self.token}'),
+        ]:
+            with self.subTest(description):
+                response = await self.async_client.get(f'/api/complaints/stream/?{query}')
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with override_settings(SSE_TICKET_MAX_AGE=-1):
+            response = await self.async_client.get(f'/api/complaints/stream/?ticket={self.ticket}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED, "Expired tickets should be refused")
+
+    def test_stream_ticket_requires_token(self):
+        response = APIClient().post('/api/complaints/streamTicket/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_requires_asgi(self):
+        response = self.client.get(f'/api/complaints/stream/?ticket={self.ticket}')
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_relay_publishes_writes_from_other_processes(self):
+        """Test bulk-loaded rows (no signals, e.g. populate_db elsewhere) are relayed from the change feed"""
+        Complaint.objects.create(unique_key="old_closed", account="NYCC01",
+            opendate=date(2024, 1, 1), closedate=date(2024, 1, 3))
+        events = ComplaintBroadcaster()
+        relay = ChangeFeedRelay(events)
+        state = relay._snapshot()
+
+        def write(unique_key, **values):
+            Complaint.objects.filter(unique_key=unique_key).update(change_seq=reserve_change_seqs(1)[0], **values)
+
+        def poll():
+            with mock.patch.object(events, 'publish_complaint', wraps=events.publish_complaint) as publish:
+                relay_state = relay._poll(*state)
+            return relay_state, [(call.args[0], call.args[1].unique_key) for call in publish.call_args_list]
+
+        Complaint.objects.bulk_create([Complaint(unique_key="loaded", account="NYCC01",
+            change_seq=reserve_change_seqs(1)[0])])
+        write("open_case", closedate=timezone.localdate())
+        write("old_closed", complaint_type="Noise")
+        state, published = poll()
+        self.assertEqual(published, [
+            (COMPLAINT_CREATED, 'loaded'),
+            (COMPLAINT_CLOSED, 'open_case'),
+            (COMPLAINT_UPDATED, 'old_closed'),
+        ], "Only the complaint that just closed should be announced as closed")
+
+        write("open_case", complaint_type="Traffic")
+        state, published = poll()
+        self.assertEqual(published, [(COMPLAINT_UPDATED, 'open_case')],
+            "A later edit of a complaint announced closed is an update")
+
+    def test_summary_endpoint(self):
+        Complaint.objects.create(unique_key="closed_case", account="NYCC01",
+            opendate=date(2024, 1, 1), closedate=date(2024, 1, 3), complaint_type="Noise")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+        response = client.get('/api/complaints/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'district': 'NYCC01',
+            'total': 2,
+            'open': 1,
+            'closed': 1,
+            'top_complaints': [{'complaint_type': 'Noise', 'count': 2}],
+        })
@@ -0,0 +1,116 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint
+from complaint_app.utils.export_utils import iter_csv_chunks
+from datetime import date
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+class ComplaintExportTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        Complaint.objects.create(
+            unique_key="open_case",
+            account="NYCC01",
+            council_dist="NYCC02",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise",
+            descriptor="Loud Music, Late Night",
+            borough="Manhattan"
+        )
+        Complaint.objects.create(
+            unique_key="closed_case",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            closedate=date(2024, 1, 15),
+            complaint_type="Traffic",
+            borough="Manhattan"
+        )
+        Complaint.objects.create(
+            unique_key="different_district",
+            account="NYCC02",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Health",
+            borough="Manhattan"
+        )
+
+    def read_csv(self, response):
+        content = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_csv_export(self):
+        with self.subTest("Exporting the district as CSV"):
+            response = self.client.get('/api/complaints/export/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK,
+                "Request should succeed")
+            self.assertEqual(response['Content-Type'], 'text/csv')
+            self.assertIn('attachment', response['Content-Disposition'])
+
+        with self.subTest("Verifying exported rows match the allComplaints filter"):
+            rows = self.read_csv(response)
+            self.assertEqual([row['unique_key'] for row in rows], ['open_case', 'closed_case'])
+            self.assertEqual(rows[0]['descriptor'], 'Loud Music, Late Night',
+                "Values containing commas should round-trip")
+            self.assertEqual(rows[1]['closedate'], '2024-01-15')
+            self.assertEqual(rows[0]['closedate'], '',
+                "Missing dates should export as empty cells")
+
+        with self.subTest("Filtering by status and constituent"):
+            response = self.client.get('/api/complaints/export/?status=open')
+            self.assertEqual([row['unique_key'] for row in self.read_csv(response)], ['open_case'])
+
+            response = self.client.get('/api/complaints/export/?constituent=true')
+            self.assertEqual([row['unique_key'] for row in self.read_csv(response)],
+                ['closed_case', 'different_district'])
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/complaints/export/?file_format=xlsx')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/complaints/export/?status=pending')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthorized_access(self):
+        response = APIClient().get('/api/complaints/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_csv_chunking(self):
+        chunks = list(iter_csv_chunks(Complaint.objects.all(), chunk_size=1))
+        self.assertEqual(len(chunks), 3,
+            "Should produce one chunk per row batch")
+        self.assertTrue(chunks[0].startswith(b'unique_key,'),
+            "Header should lead the first chunk")
+
+        chunks = list(iter_csv_chunks(Complaint.objects.none()))
+        self.assertEqual(len(chunks), 1,
+            "An empty export should still contain the header")
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_export(self):
+        response = self.client.get('/api/complaints/export/?file_format=parquet')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.column('unique_key').to_pylist(), ['open_case', 'closed_case'])
+        self.assertEqual(table.column('closedate').to_pylist(), [None, date(2024, 1, 15)])
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, 'export.csv')
+            call_command('export_complaints', '1', output, '--status', 'closed', stdout=io.StringIO())
+
+            with open(output, newline='') as export_file:
+                rows = list(csv.DictReader(export_file))
+            self.assertEqual([row['unique_key'] for row in rows], ['closed_case'])
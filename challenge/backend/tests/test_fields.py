@@ -0,0 +1,71 @@
+import json
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint
+from complaint_app.serializers import ComplaintSerializer
+from datetime import date
+
+class SparseFieldsetTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        Complaint.objects.create(
+            unique_key="open_case",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise",
+            descriptor="Loud Music",
+            borough="Manhattan"
+        )
+        Complaint.objects.create(
+            unique_key="closed_case",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            closedate=date(2024, 1, 15),
+            complaint_type="Traffic",
+            borough="Manhattan"
+        )
+
+    def test_fields_limit_output(self):
+        endpoints = ['allComplaints', 'openCases', 'closedCases', 'constituentComplaints']
+        for endpoint in endpoints:
+            with self.subTest(f"Projecting {endpoint}"):
+                response = self.client.get(f'/api/complaints/{endpoint}/?fields=closedate,unique_key', HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK,
+                    "Request should succeed")
+                for complaint in response.json():
+                    self.assertEqual(list(complaint), ['unique_key', 'closedate'],
+                        "Only the requested fields, in the usual field order")
+
+        response = self.client.get('/api/complaints/closedCases/?fields=unique_key,closedate', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), [{'unique_key': 'closed_case', 'closedate': '2024-01-15'}])
+
+    def test_fields_limit_select(self):
+        """The SELECT list should only contain the requested columns"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/complaints/allComplaints/?fields=unique_key,complaint_type')
+        complaint_query = next(q['sql'] for q in queries if 'FROM "complaint_app_complaint"' in q['sql'])
+        select_list = complaint_query.split(' FROM ')[0]
+        self.assertIn('"unique_key"', select_list)
+        self.assertIn('"complaint_type"', select_list)
+        self.assertNotIn('"descriptor"', select_list)
+        self.assertNotIn('"community_board"', select_list)
+
+    def test_default_output_unchanged(self):
+        """Without fields the response is byte-identical to serializing every column"""
+        response = self.client.get('/api/complaints/allComplaints/', HTTP_ACCEPT='application/json')
+        expected = ComplaintSerializer(Complaint.objects.filter(account="NYCC01"), many=True).data
+        self.assertEqual(response.content, json.dumps(expected, separators=(',', ':')).encode())
+
+    def test_fields_with_changes_feed(self):
+        response = self.client.get('/api/complaints/allComplaints/?since=0&fields=unique_key')
+        self.assertEqual(response.data['changed'], [{'unique_key': 'open_case'}, {'unique_key': 'closed_case'}])
+
+    def test_invalid_fields(self):
+        for query in ['fields=unique_key,password', 'fields=', 'fields=,']:
+            with self.subTest(query):
+                response = self.client.get(f'/api/complaints/allComplaints/?{query}')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
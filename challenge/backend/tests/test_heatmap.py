@@ -0,0 +1,111 @@
+import io
+from django.core.management import call_command
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint, ComplaintAggregate
+from datetime import date
+
+class HeatmapTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        self.open_noise = Complaint.objects.create(
+            unique_key="open_noise",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise",
+            zip="10001",
+            community_board="01 Manhattan"
+        )
+        Complaint.objects.create(
+            unique_key="closed_noise",
+            account="NYCC01",
+            council_dist="NYCC02",
+            opendate=date(2024, 1, 1),
+            closedate=date(2024, 1, 15),
+            complaint_type="Noise",
+            zip="10001",
+            community_board="01 Manhattan"
+        )
+        Complaint.objects.create(
+            unique_key="open_traffic",
+            account="NYCC01",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Traffic",
+            zip="10002",
+            community_board="03 Manhattan"
+        )
+        Complaint.objects.create(
+            unique_key="different_district",
+            account="NYCC02",
+            council_dist="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise",
+            zip="10001",
+            community_board="01 Manhattan"
+        )
+
+    def get_heatmap(self, query=''):
+        response = self.client.get(f'/api/complaints/heatmap/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK,
+            "Request should succeed")
+        return response.data
+
+    def test_zip_heatmap(self):
+        with self.subTest("Counts per zip for the user's district"):
+            self.assertEqual(self.get_heatmap(), [
+                {'zip': '10001', 'count': 2},
+                {'zip': '10002', 'count': 1},
+            ])
+
+        with self.subTest("Constituent mode counts by council_dist"):
+            self.assertEqual(self.get_heatmap('?constituent=true'), [
+                {'zip': '10001', 'count': 2},
+                {'zip': '10002', 'count': 1},
+            ])
+
+        with self.subTest("Council-wide scope includes every district"):
+            self.assertEqual(self.get_heatmap('?scope=council'), [
+                {'zip': '10001', 'count': 3},
+                {'zip': '10002', 'count': 1},
+            ])
+
+    def test_community_board_split(self):
+        heatmap = self.get_heatmap('?level=community_board&split=complaint_type,status')
+        self.assertEqual(heatmap, [
+            {'community_board': '01 Manhattan', 'complaint_type': 'Noise', 'status': 'closed', 'count': 1},
+            {'community_board': '01 Manhattan', 'complaint_type': 'Noise', 'status': 'open', 'count': 1},
+            {'community_board': '03 Manhattan', 'complaint_type': 'Traffic', 'status': 'open', 'count': 1},
+        ])
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/complaints/heatmap/?level=borough')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/complaints/heatmap/?split=descriptor')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_incremental_refresh(self):
+        with self.subTest("Closing a complaint moves it between status buckets"):
+            self.open_noise.closedate = date(2024, 2, 1)
+            self.open_noise.save()
+            heatmap = self.get_heatmap('?split=status')
+            self.assertIn({'zip': '10001', 'status': 'closed', 'count': 2}, heatmap)
+            self.assertNotIn('open', [row['status'] for row in heatmap if row['zip'] == '10001'])
+
+        with self.subTest("Deleting a complaint decrements its bucket"):
+            Complaint.objects.filter(unique_key="open_traffic").delete()
+            self.assertEqual(self.get_heatmap(), [{'zip': '10001', 'count': 2}])
+
+    def test_rebuild_matches_incremental(self):
+        """Test a full rebuild produces the same counts the signals maintained"""
+        def snapshot():
+            return sorted(ComplaintAggregate.objects.filter(count__gt=0).values_list(
+                'account', 'council_dist', 'zip', 'community_board', 'complaint_type', 'status', 'count'))
+
+        self.open_noise.zip = None
+        self.open_noise.save()
+        incremental = snapshot()
+        call_command('refresh_heatmap', stdout=io.StringIO())
+        self.assertEqual(snapshot(), incremental)
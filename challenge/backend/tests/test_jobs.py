@@ -0,0 +1,203 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.test import override_settings
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.models import Complaint, ReportJob
+from complaint_app import jobs
+from datetime import date
+
+class ReportJobTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        self.result_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(REPORT_JOB_RESULT_DIR=self.result_dir)
+        self.settings_override.enable()
+
+        Complaint.objects.create(
+            unique_key="open_case",
+            account="NYCC01",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise"
+        )
+        Complaint.objects.create(
+            unique_key="closed_case",
+            account="NYCC01",
+            opendate=date(2024, 1, 1),
+            closedate=date(2024, 1, 15),
+            complaint_type="Traffic"
+        )
+        Complaint.objects.create(
+            unique_key="different_district",
+            account="NYCC02",
+            opendate=date(2024, 1, 1),
+            complaint_type="Noise"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.result_dir)
+
+    def run_workers(self):
+        call_command('run_workers', workers=0, once=True, stdout=io.StringIO())
+
+    def test_export_job_lifecycle(self):
+        with self.subTest("Submitting an export job"):
+            response = self.client.post('/api/complaints/jobs/', {
+                'kind': 'export',
+                'status': 'open'
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data['status'], 'queued')
+            job_id = response.data['id']
+
+        with self.subTest("Result is not downloadable before the job runs"):
+            response = self.client.get(f'/api/complaints/jobs/{job_id}/download/')
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        with self.subTest("Polling after the workers ran"):
+            self.run_workers()
+            response = self.client.get(f'/api/complaints/jobs/{job_id}/')
+            self.assertEqual(response.data['status'], 'succeeded')
+            self.assertEqual(response.data['attempts'], 1)
+
+        with self.subTest("Downloading the result"):
+            response = self.client.get(f'/api/complaints/jobs/{job_id}/download/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = b''.join(response.streaming_content).decode('utf-8')
+            self.assertIn('open_case', content)
+            self.assertNotIn('closed_case', content)
+
+    def test_council_report_job(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT, {'filter_field': 'account'})
+        self.run_workers()
+        job.refresh_from_db()
+
+        with open(job.result_path) as result_file:
+            report = json.load(result_file)
+        self.assertEqual(report['districts']['NYCC01']['open'], 1)
+        self.assertEqual(report['districts']['NYCC01']['closed'], 1)
+        self.assertEqual(report['districts']['NYCC02']['top_complaints'],
+            [{'complaint_type': 'Noise', 'count': 1}])
+
+    def test_jobs_are_private(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT, user=None)
+        response = self.client.get(f'/api/complaints/jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND,
+            "Users should only see their own jobs")
+
+    def test_invalid_kind(self):
+        response = self.client.post('/api/complaints/jobs/', {'kind': 'everything'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retries_then_fails(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT)
+        failing_handlers = {ReportJob.KIND_COUNCIL_REPORT: mock.Mock(side_effect=RuntimeError("boom"))}
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, failing_handlers):
+            with self.subTest("A failed attempt is requeued with backoff"):
+                self.run_workers()
+                job.refresh_from_db()
+                self.assertEqual(job.status, 'queued')
+                self.assertEqual(job.attempts, 1)
+                self.assertGreater(job.available_at, timezone.now())
+                self.assertIn('boom', job.error)
+
+            with self.subTest("The job fails once attempts are exhausted"):
+                for _ in range(job.max_attempts):
+                    ReportJob.objects.filter(id=job.id).update(available_at=timezone.now())
+                    self.run_workers()
+                job.refresh_from_db()
+                self.assertEqual(job.status, 'failed')
+                self.assertEqual(job.attempts, job.max_attempts)
+
+    def test_killed_worker_requeues_job_and_pool_recovers(self):
+        first = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT)
+        second = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT)
+        # The worker process exits mid-job, which breaks the pool
+        with mock.patch('complaint_app.management.commands.run_workers.run_job', os._exit):
+            call_command('run_workers', workers=1, once=True, poll_interval=0.1,
+                stdout=io.StringIO(), stderr=io.StringIO())
+
+        for job in (first, second):
+            with self.subTest(job=job.id):
+                job.refresh_from_db()
+                self.assertEqual(job.status, 'queued',
+                    "A job whose worker died should be requeued right away, not left running")
+                self.assertEqual(job.attempts, 1)
+                self.assertIn("Worker process died", job.error)
+
+    def test_stale_check_follows_heartbeats(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT)
+        jobs.claim_next_job()
+        long_ago = timezone.now() - timedelta(seconds=settings.REPORT_JOB_HEARTBEAT_TIMEOUT + 60)
+        ReportJob.objects.filter(id=job.id).update(started_at=long_ago)
+        jobs.heartbeat_jobs([job.id])
+        self.assertEqual(jobs.requeue_stale_jobs(), 0,
+            "A long-running job with a live scheduler should stay running")
+
+        ReportJob.objects.filter(id=job.id).update(heartbeat_at=long_ago)
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+
+    @override_settings(REPORT_JOB_TIMEOUT=0)
+    def test_overrunning_job_is_stopped(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT)
+        ReportJob.objects.filter(id=job.id).update(max_attempts=1)
+        # A worker that would otherwise keep running past the timeout
+        with mock.patch('complaint_app.management.commands.run_workers.run_job', time.sleep):
+            call_command('run_workers', workers=1, once=True, poll_interval=0.1,
+                stdout=io.StringIO(), stderr=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed', "The job should be stopped, not requeued behind its own back")
+        self.assertIn("Timed out", job.error)
+        self.assertEqual(job.attempts, 1, "The job should not have been claimed again")
+
+    def test_download_of_missing_result(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT, user=self.user)
+        self.run_workers()
+        job.refresh_from_db()
+        os.remove(job.result_path)
+        response = self.client.get(f'/api/complaints/jobs/{job.id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE,
+            "A deleted result file should not be a server error")
+        self.assertIn('error', response.json())
+
+    def test_submit_error_is_reported(self):
+        with mock.patch('complaint_app.views.submit_job', side_effect=RuntimeError("queue down")):
+            response = self.client.post('/api/complaints/jobs/', {'kind': 'council_report'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.json(), {"error": "queue down"})
+
+    def test_claim_is_exclusive(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT)
+        self.assertEqual(jobs.claim_next_job().id, job.id)
+        self.assertIsNone(jobs.claim_next_job(),
+            "A running job should not be claimed twice")
+
+    def test_result_expiry(self):
+        job = jobs.submit_job(ReportJob.KIND_COUNCIL_REPORT, user=self.user)
+        self.run_workers()
+        job.refresh_from_db()
+        self.assertTrue(os.path.exists(job.result_path))
+
+        ReportJob.objects.filter(id=job.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.run_workers()
+        result_path = job.result_path
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, 'expired')
+        self.assertFalse(os.path.exists(result_path))
+        response = self.client.get(f'/api/complaints/jobs/{job.id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.test import override_settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+from backend.tests.base import SignedInTestCase
+from complaint_app.middleware import RequestProfilingMiddleware
+from complaint_app.utils.profiling_utils import list_profile_dumps, make_profile_token
+
+class RequestProfilingTests(SignedInTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+
+    def profiled_get(self, path, sample_rate=0.0, max_files=10, **headers):
+        # A fresh client so the middleware chain is built with the overridden settings
+        with override_settings(
+            REQUEST_PROFILING_ENABLED=True,
+            REQUEST_PROFILING_SAMPLE_RATE=sample_rate,
+            REQUEST_PROFILING_DIR=self.profile_dir,
+            REQUEST_PROFILING_MAX_FILES=max_files
+        ):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+            return client.get(path, HTTP_ACCEPT='application/json', **headers)
+
+    def dump_names(self):
+        return [os.path.basename(path) for path in list_profile_dumps(self.profile_dir)]
+
+    def test_disabled_middleware_leaves_the_chain(self):
+        with override_settings(REQUEST_PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                RequestProfilingMiddleware(lambda request: None)
+
+    def test_sampled_request_is_dumped_with_labels(self):
+        response = self.profiled_get('/api/complaints/openCases/', sample_rate=1.0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, "Profiling should not change the response")
+        names = self.dump_names()
+        self.assertEqual(len(names), 1, "One dump per profiled request")
+        self.assertIn("_api-complaints-openCases_NYCC01_", names[0], "Dump should be labelled with route and district")
+
+    def test_signed_header(self):
+        cases = [
+            (make_profile_token(), 1),
+            ("not-a-token", 0),
+        ]
+        for token, expected in cases:
+            with self.subTest(token=token):
+                shutil.rmtree(self.profile_dir, ignore_errors=True)
+                self.profiled_get('/api/complaints/summary/', HTTP_X_PROFILE_TOKEN=token)
+                self.assertEqual(len(self.dump_names()), expected)
+
+    def test_dumps_rotate_and_summarize(self):
+        for _ in range(3):
+            self.profiled_get('/api/complaints/allComplaints/?constituent=true', sample_rate=1.0, max_files=2)
+        self.assertEqual(len(self.dump_names()), 2, "Only the newest dumps should be kept")
+
+        out = StringIO()
+        call_command('profile_summary', f'--dir={self.profile_dir}', '--route=allComplaints', stdout=out)
+        self.assertIn("api-complaints-allComplaints_NYCC01-constituent", out.getvalue())
+        self.assertIn("cumulative", out.getvalue(), "Summary should list hotspots by cumulative time")
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from backend import settings_api
+from backend.tests.base import SignedInTestCase
+
+@override_settings(MIDDLEWARE=settings_api.MIDDLEWARE, REST_FRAMEWORK=settings_api.REST_FRAMEWORK)
+class ApiSettingsProfileTests(SignedInTestCase):
+    def test_profile_is_trimmed(self):
+        self.assertEqual(settings_api.MIDDLEWARE[0], 'corsheaders.middleware.CorsMiddleware',
+            "CORS should come before any middleware that can answer a request")
+        for app in ['django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages', 'django.contrib.staticfiles']:
+            with self.subTest(app):
+                self.assertNotIn(app, settings_api.INSTALLED_APPS)
+
+    def test_token_api_works_with_lean_middleware(self):
+        for endpoint in ['allComplaints', 'openCases', 'summary']:
+            with self.subTest(endpoint):
+                response = self.client.get(f'/api/complaints/{endpoint}/', HTTP_ORIGIN='http://localhost:3000')
+                self.assertEqual(response.status_code, status.HTTP_200_OK, "Request should succeed")
+                self.assertEqual(response['Content-Type'], 'application/json', "Only JSON is rendered")
+                self.assertEqual(response['Access-Control-Allow-Origin'], 'http://localhost:3000')
+
+# Run in a fresh interpreter booted with backend.settings_api: creates an in-memory
+# test database, logs in and fetches the summary through the test client
+REQUEST_SCRIPT = """
+import json
+import django
+django.setup()
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.contrib.auth.models import User
+from complaint_app.models import UserProfile
+
+setup_test_environment()
+connection.creation.create_test_db(verbosity=0)
+user = User.objects.create_user(username="jdoe", password="doe-1")
+UserProfile.objects.create(user=user, full_name="John Doe", district="1", borough="Manhattan")
+client = Client()
+token = client.post('/login/', {'username': "jdoe", 'password': "doe-1"}, content_type='application/json').json()['token']
+response = client.get('/api/complaints/summary/', HTTP_AUTHORIZATION=f'Token {token}')
+print(json.dumps({'status': response.status_code, 'content_type': response['Content-Type']}))
+"""
+
+class ApiSettingsBootTests(SimpleTestCase):
+    """Boots the project with DJANGO_SETTINGS_MODULE=backend.settings_api in a subprocess"""
+
+    def run_with_api_settings(self, *args):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'backend.settings_api'}
+        result = subprocess.run([sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_system_check_passes(self):
+        output = self.run_with_api_settings('manage.py', 'check')
+        self.assertIn("System check identified no issues", output)
+
+    def test_request_through_api_profile(self):
+        output = self.run_with_api_settings('-c', REQUEST_SCRIPT)
+        response = json.loads(output.strip().splitlines()[-1])
+        self.assertEqual(response['status'], status.HTTP_200_OK, "Request should succeed")
+        self.assertEqual(response['content_type'], 'application/json', "Only JSON is rendered")
@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from complaint_app.signals import tune_sqlite_connection
+from complaint_app.utils.sqlite_utils import SQLITE_PRAGMA_PROFILES, apply_sqlite_pragmas, retry_on_locked
+
+class SqlitePragmaTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # Same lock timeout as settings.DATABASES
+        self.db = sqlite3.connect(os.path.join(self.tmp_dir.name, 'test.sqlite3'), timeout=20)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def pragma(self, name):
+        return self.db.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_production_profile(self):
+        """Test the production profile enables WAL and the tuned cache settings"""
+        apply_sqlite_pragmas(self.db, SQLITE_PRAGMA_PROFILES['production'])
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1, "1 is NORMAL")
+        self.assertEqual(self.pragma('temp_store'), 2, "2 is MEMORY")
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma('busy_timeout'), 20000, "The connection's timeout should be kept")
+
+    def test_connection_hook_uses_profile(self):
+        """Test new Django connections get the pragmas of settings.SQLITE_PROFILE"""
+        wrapper = mock.Mock(vendor='sqlite', connection=self.db)
+        with override_settings(SQLITE_PROFILE='default'):
+            tune_sqlite_connection(sender=None, connection=wrapper)
+        self.assertEqual(self.pragma('journal_mode'), 'delete')
+
+        with override_settings(SQLITE_PROFILE='production'):
+            tune_sqlite_connection(sender=None, connection=wrapper)
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+
+class RetryOnLockedTests(SimpleTestCase):
+    def test_retries_locked_errors(self):
+        """Test a locked database is retried until the call succeeds"""
+        func = mock.Mock(side_effect=[sqlite3.OperationalError("database is locked"), "done"])
+        self.assertEqual(retry_on_locked(func, (sqlite3.OperationalError,), backoff=0), "done")
+        self.assertEqual(func.call_count, 2)
+
+    def test_gives_up_after_attempts(self):
+        func = mock.Mock(side_effect=sqlite3.OperationalError("database is locked"))
+        with self.assertRaises(sqlite3.OperationalError):
+            retry_on_locked(func, (sqlite3.OperationalError,), attempts=3, backoff=0)
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        func = mock.Mock(side_effect=sqlite3.OperationalError("no such table: complaint"))
+        with self.assertRaises(sqlite3.OperationalError):
+            retry_on_locked(func, (sqlite3.OperationalError,), backoff=0)
+        self.assertEqual(func.call_count, 1)
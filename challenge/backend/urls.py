@@ -13,16 +13,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.settings import api_settings
 
 class BrowsableObtainAuthToken(ObtainAuthToken):
-    renderer_classes = [JSONRenderer, BrowsableAPIRenderer]
+    # Browsable only in settings profiles that enable the browsable API
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer] if BrowsableAPIRenderer in api_settings.DEFAULT_RENDERER_CLASSES else [JSONRenderer]
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('login/', BrowsableObtainAuthToken.as_view(), name='login'),
     path('api/complaints/', include('complaint_app.urls')),
 ]
+
+# The API-only profile (backend.settings_api) leaves the admin out
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
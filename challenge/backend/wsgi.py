@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/2.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
+
+if settings.WARM_CACHE_ON_STARTUP:
+    from complaint_app.utils.cache_utils import warm_cache_in_background
+    warm_cache_in_background()
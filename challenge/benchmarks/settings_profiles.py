@@ -0,0 +1,113 @@
+"""
+Startup time and per-request overhead of the full (backend.settings) and API-only
+(backend.settings_api) settings profiles.
+
+Startup: each run is a fresh interpreter under `python -X importtime` that sets Django
+up and loads the WSGI application, like a new worker. Reports the wall time, the
+cumulative import time of the slowest top-level imports, and the number of modules loaded.
+
+Per request: in a fresh interpreter per profile, sends requests straight to the WSGI
+handler for a path no view matches, so the time is the middleware chain, URL
+resolution and the 404 response, without any view or database work.
+
+Usage, from the challenge/ folder:
+    python benchmarks/settings_profiles.py [--runs 5] [--requests 5000]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+CHALLENGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ['backend.settings', 'backend.settings_api']
+
+STARTUP_SCRIPT = """
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns  # the URLconf is otherwise loaded by the first request
+"""
+
+REQUEST_SCRIPT = """
+import sys, time
+import django
+django.setup()
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.test import RequestFactory
+
+# As in production: plain 404s rather than DEBUG's technical pages
+settings.DEBUG = False
+settings.ALLOWED_HOSTS = ['testserver']
+requests = int(sys.argv[1])
+handler = get_wsgi_application()
+factory = RequestFactory()
+
+def start_response(status, headers):
+    pass
+
+def send(count):
+    for _ in range(count):
+        handler(factory.get('/benchmark-no-such-path/').environ, start_response)
+
+send(200)  # warm up
+started = time.perf_counter()
+send(requests)
+print(time.perf_counter() - started)
+"""
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def run(profile, args, script):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile, 'PYTHONPATH': CHALLENGE_DIR}
+    return subprocess.run(
+        [sys.executable, *args, '-c', script],
+        cwd=CHALLENGE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+def measure_startup(profile):
+    """
+    @return tuple - (wall seconds, modules imported, {top-level module: cumulative microseconds})
+    """
+    started = time.perf_counter()
+    result = run(profile, ['-X', 'importtime'], STARTUP_SCRIPT)
+    wall = time.perf_counter() - started
+    lines = [IMPORTTIME_LINE.match(line) for line in result.stderr.splitlines()]
+    lines = [line for line in lines if line]
+    top_imports = {line.group(4): int(line.group(2)) for line in lines if len(line.group(3)) == 1}
+    return wall, len(lines), top_imports
+
+def measure_requests(profile, requests):
+    result = run(profile, [], REQUEST_SCRIPT.replace('sys.argv[1]', str(requests)))
+    return float(result.stdout.strip()) / requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help="Interpreter starts per profile")
+    parser.add_argument('--requests', type=int, default=5000, help="Requests timed per profile")
+    args = parser.parse_args()
+
+    walls = {profile: [] for profile in PROFILES}
+    modules, top_imports = {}, {}
+    # Alternate the profiles so machine noise affects both alike
+    for _ in range(args.runs):
+        for profile in PROFILES:
+            wall, modules[profile], top_imports[profile] = measure_startup(profile)
+            walls[profile].append(wall)
+
+    for profile in PROFILES:
+        per_request = measure_requests(profile, args.requests)
+        print(f"{profile}")
+        print(f"  startup (median of {args.runs}): {statistics.median(walls[profile]) * 1000:.0f} ms, "
+              f"{modules[profile]} modules imported")
+        for module, micros in sorted(top_imports[profile].items(), key=lambda item: -item[1])[:5]:
+            print(f"    {micros / 1000:7.1f} ms  {module}")
+        print(f"  per request (middleware + routing): {per_request * 1e6:.1f} us")
+
+if __name__ == '__main__':
+    main()
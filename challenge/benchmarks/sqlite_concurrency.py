@@ -0,0 +1,153 @@
+"""
+Reader/writer concurrency during a bulk load, per SQLite PRAGMA profile.
+
+A writer bulk-inserts complaint rows in committed batches (like populate_db) while
+reader processes, standing in for separate web workers, keep running the district count queries the dashboard issues.
+Compare how many reads get through and how long they stall under each profile.
+
+Usage, from the challenge/ folder:
+    python benchmarks/sqlite_concurrency.py [--rows 200000] [--batch 500] [--readers 4]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import multiprocessing
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from complaint_app.utils.sqlite_utils import SQLITE_PRAGMA_PROFILES, apply_sqlite_pragmas
+
+SCHEMA = """
+CREATE TABLE complaint_app_complaint (
+    id integer PRIMARY KEY AUTOINCREMENT,
+    unique_key varchar(150) NOT NULL,
+    account varchar(10) NULL,
+    opendate date NULL,
+    complaint_type varchar(150) NULL,
+    descriptor varchar(150) NULL,
+    zip varchar(5) NULL,
+    borough varchar(50) NULL,
+    city varchar(50) NULL,
+    council_dist varchar(10) NULL,
+    community_board varchar(150) NULL,
+    closedate date NULL
+)
+"""
+COMPLAINT_TYPES = ['Noise', 'Housing and Buildings', 'Traffic', 'Parks', 'Health', 'Sanitation']
+
+def connect(path, pragmas):
+    # Same busy timeout as settings.DATABASES so only the pragmas differ
+    connection = sqlite3.connect(path, timeout=20, check_same_thread=False)
+    apply_sqlite_pragmas(connection, pragmas)
+    return connection
+
+def make_rows(start, count):
+    for i in range(start, start + count):
+        district = f"NYCC{random.randint(1, 51):02d}"
+        closed = random.random() < 0.7
+        yield (
+            f"KEY{i}", district, '2019-01-01', random.choice(COMPLAINT_TYPES), 'descriptor',
+            '10001', 'Manhattan', 'New York', district, '01 Manhattan', '2019-06-01' if closed else None
+        )
+
+def writer(path, pragmas, rows, batch, timings):
+    connection = connect(path, pragmas)
+    started = time.perf_counter()
+    for start in range(0, rows, batch):
+        with connection:
+            connection.executemany(
+                "INSERT INTO complaint_app_complaint (unique_key, account, opendate, complaint_type, descriptor,"
+                " zip, borough, city, council_dist, community_board, closedate)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                make_rows(start, min(batch, rows - start))
+            )
+    timings['write'] = time.perf_counter() - started
+    connection.close()
+
+def reader(path, pragmas, done, results):
+    latencies, errors = [], 0
+    connection = connect(path, pragmas)
+    while not done.is_set():
+        district = f"NYCC{random.randint(1, 51):02d}"
+        started = time.perf_counter()
+        try:
+            connection.execute(
+                "SELECT COUNT(*) FROM complaint_app_complaint"
+                " WHERE account = ? AND opendate IS NOT NULL AND closedate IS NULL",
+                (district,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    connection.close()
+    results.put((latencies, errors))
+
+def run(profile, rows, batch, readers):
+    pragmas = SQLITE_PRAGMA_PROFILES[profile]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.sqlite3')
+        setup = connect(path, pragmas)
+        setup.execute(SCHEMA)
+        setup.execute("CREATE INDEX complaint_account ON complaint_app_complaint (account)")
+        setup.commit()
+        setup.close()
+
+        done = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        timings = {}
+        reader_processes = [
+            multiprocessing.Process(target=reader, args=(path, pragmas, done, results))
+            for _ in range(readers)
+        ]
+        for process in reader_processes:
+            process.start()
+        writer(path, pragmas, rows, batch, timings)
+        done.set()
+
+        latencies, errors = [], 0
+        for _ in reader_processes:
+            process_latencies, process_errors = results.get()
+            latencies.extend(process_latencies)
+            errors += process_errors
+        for process in reader_processes:
+            process.join()
+
+    latencies.sort()
+    return {
+        'profile': profile,
+        'write_seconds': timings['write'],
+        'reads': len(latencies),
+        'reads_per_second': len(latencies) / timings['write'],
+        'read_p50_ms': statistics.median(latencies) * 1000 if latencies else float('nan'),
+        'read_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float('nan'),
+        'read_max_ms': latencies[-1] * 1000 if latencies else float('nan'),
+        'read_errors': errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PRAGMA_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows in batches of {args.batch}, {args.readers} concurrent readers")
+    header = f"{'profile':<12}{'load s':>9}{'reads':>9}{'reads/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}"
+    print(header)
+    print('-' * len(header))
+    for profile in args.profiles:
+        result = run(profile, args.rows, args.batch, args.readers)
+        print(
+            f"{result['profile']:<12}{result['write_seconds']:>9.2f}{result['reads']:>9}"
+            f"{result['reads_per_second']:>10.0f}{result['read_p50_ms']:>9.2f}{result['read_p99_ms']:>9.2f}"
+            f"{result['read_max_ms']:>9.2f}{result['read_errors']:>8}"
+        )
+
+if __name__ == '__main__':
+    main()
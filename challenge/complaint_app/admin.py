@@ -1,6 +1,144 @@
 from django.contrib import admin
-from complaint_app.models import UserProfile, Complaint
+from math import ceil
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from complaint_app.models import UserProfile, Complaint, ComplaintAggregate
+from complaint_app.utils.query_utils import STATUS_FILTERS
+from complaint_app.utils.cache_utils import get_council_districts
 
 # Register your models here.
-admin.site.register(Complaint)
-admin.site.register(UserProfile)
\ No newline at end of file
+
+# Counting stops here: pages past it are not offered, so neither COUNT(*) nor
+# OFFSET ever scan more than this many rows, however big the table gets
+ADMIN_COUNT_LIMIT = 10000
+
+def estimate_table_rows(model, using):
+    """
+    Row count estimate from the database's statistics, without scanning the table.
+
+    @return int or None - The estimate, or None if the backend keeps no usable statistics
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables"
+                " WHERE table_schema = DATABASE() AND table_name = %s", [table])
+        elif connection.vendor == 'sqlite':
+            # Only present after ANALYZE. There is a row per index (one with idx NULL
+            # only for tables without any), each starting with the table's row count
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large changelists. The unfiltered count comes from table
+    statistics when available; otherwise counts are capped at ADMIN_COUNT_LIMIT.
+    Either way only the pages within the first ADMIN_COUNT_LIMIT rows are offered.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > ADMIN_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:ADMIN_COUNT_LIMIT].count()
+
+    @cached_property
+    def num_pages(self):
+        # An estimated count may run into the millions; pages past the limit would need an OFFSET that large
+        return min(super().num_pages, max(1, ceil(ADMIN_COUNT_LIMIT / self.per_page)))
+
+class CaseStatusListFilter(admin.SimpleListFilter):
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return (('open', 'Open'), ('closed', 'Closed'))
+
+    def queryset(self, request, queryset):
+        if self.value() in ('open', 'closed'):
+            return queryset.filter(**STATUS_FILTERS[self.value()])
+        return queryset
+
+class FieldValueListFilter(admin.SimpleListFilter):
+    """
+    Exact-match filter on the field named by parameter_name. Subclasses list the
+    choices in lookups() from somewhere small, unlike the default field filter's
+    SELECT DISTINCT over the whole complaint table.
+    """
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+class AccountListFilter(FieldValueListFilter):
+    title = 'account'
+    parameter_name = 'account'
+
+    def lookups(self, request, model_admin):
+        return [(district, district) for district in get_council_districts()]
+
+class CouncilDistrictListFilter(FieldValueListFilter):
+    title = 'council district'
+    parameter_name = 'council_dist'
+
+    def lookups(self, request, model_admin):
+        return [(district, district) for district in get_council_districts()]
+
+class ComplaintTypeListFilter(FieldValueListFilter):
+    title = 'complaint type'
+    parameter_name = 'complaint_type'
+
+    def lookups(self, request, model_admin):
+        # ComplaintAggregate holds one row per type and district, not one per complaint
+        complaint_types = (ComplaintAggregate.objects
+          .filter(count__gt=0)
+          .exclude(complaint_type="")
+          .order_by('complaint_type')
+          .values_list('complaint_type', flat=True)
+          .distinct()
+        )
+        return [(complaint_type, complaint_type) for complaint_type in complaint_types]
+
+@admin.register(Complaint)
+class ComplaintAdmin(admin.ModelAdmin):
+    list_display = ('unique_key', 'account', 'council_dist', 'complaint_type', 'opendate', 'closedate')
+    # Each filter is backed by an index on Complaint
+    list_filter = (CaseStatusListFilter, AccountListFilter, CouncilDistrictListFilter, ComplaintTypeListFilter)
+    search_fields = ('unique_key',)
+    search_help_text = "Exact unique key or its beginning, e.g. NYCC42500"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Avoid an extra COUNT per filter choice
+    show_facets = admin.ShowFacets.NEVER
+    readonly_fields = ('updated_at', 'change_seq')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Prefix match on unique_key as a range, which every backend serves from the
+        # unique_key index (unlike icontains, or LIKE on case-insensitive collations)
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(unique_key__gte=search_term, unique_key__lt=search_term + '\uffff'), False
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'full_name', 'district', 'party', 'borough')
+    list_select_related = ('user',)
+    search_fields = ('full_name', 'user__username')
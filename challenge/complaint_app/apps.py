@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ComplaintAppConfig(AppConfig):
     name = 'complaint_app'
+
+    def ready(self):
+        # Register signal receivers
+        from . import signals
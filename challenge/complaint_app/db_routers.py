@@ -0,0 +1,34 @@
+import random
+from django.conf import settings
+
+class ReadReplicaRouter:
+    """
+    Sends reads of the read-only complaint data to the replica aliases in
+    DATABASE_REPLICA_ALIASES, and everything else (writes, auth, tokens,
+    user profiles, jobs) to the primary 'default' database.
+
+    Which models count as complaint data is set by DATABASE_REPLICA_MODELS
+    ("app_label.model_name" labels). Writes are never routed to a replica, so
+    loaders such as populate_db always hit the primary.
+    """
+
+    def _replicas(self):
+        return getattr(settings, 'DATABASE_REPLICA_ALIASES', [])
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if replicas and model._meta.label_lower in settings.DATABASE_REPLICA_MODELS:
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        pool = {'default', *self._replicas()}
+        return obj1._state.db in pool and obj2._state.db in pool
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication, not migrations
+        return db not in self._replicas()
@@ -0,0 +1,217 @@
+"""
+In-process broadcaster behind the complaint event stream (api/complaints/stream/).
+
+Complaint writes in this process are published by the signals in signals.py and by
+loaders through publish_complaints(). Writes made by other processes (populate_db,
+another web worker) are picked up by ChangeFeedRelay, which follows the change_seq
+feed while anyone is subscribed. Subscribers are asyncio queues, so an idle SSE
+connection costs one pending await and no thread.
+"""
+import asyncio
+import threading
+from collections import OrderedDict, defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+from .models import Complaint
+
+COMPLAINT_CREATED = 'complaint.created'
+COMPLAINT_CLOSED = 'complaint.closed'
+# Any other change to a complaint, e.g. a reassignment or an edit of a closed complaint
+COMPLAINT_UPDATED = 'complaint.updated'
+
+# How many published change sequence numbers to remember for de-duplicating the relay
+PUBLISHED_SEQS_TO_REMEMBER = 10000
+
+def district_channel(filter_field, padded_district):
+    return f"{filter_field}:{padded_district}"
+
+def complaint_channels(complaint):
+    # A complaint is news both for its account's district and its constituents' district
+    return {
+        district_channel('account', complaint.account),
+        district_channel('council_dist', complaint.council_dist),
+    }
+
+class Subscription:
+    """A subscriber's queue, bound to the event loop that created it."""
+
+    def __init__(self, channels, maxsize):
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        # Set when the subscriber fell behind and events were dropped
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def next_events(self, timeout):
+        """
+        Waits up to timeout seconds for an event, then drains whatever else is queued.
+
+        @return list - The events, empty if the wait timed out
+        """
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+class ComplaintBroadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._published_seqs = OrderedDict()
+        # Complaints announced closed, so a later edit is not announced as a close again
+        self._closed_ids = OrderedDict()
+
+    def subscribe(self, channels, maxsize=None):
+        """
+        Registers a subscriber for the given channels. Must be called from a running event loop.
+
+        @param channels - Channel names from district_channel()
+        @param maxsize - Queue bound, defaults to settings.SSE_QUEUE_SIZE
+
+        @return Subscription - Pass to unsubscribe() when done
+        """
+        subscription = Subscription(channels, maxsize or settings.SSE_QUEUE_SIZE)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].discard(subscription)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, channels, event):
+        """
+        Delivers event to every subscriber of any of the channels. Safe to call from any thread.
+        """
+        with self._lock:
+            subscriptions = set().union(*(self._subscribers.get(channel, ()) for channel in channels))
+        for subscription in subscriptions:
+            if subscription.loop.is_closed():
+                continue
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+    def publish_complaint(self, event_type, complaint):
+        """
+        Publishes a complaint event to the complaint's district channels.
+
+        @param event_type - COMPLAINT_CREATED, COMPLAINT_CLOSED or COMPLAINT_UPDATED
+        @param complaint - The Complaint instance, as committed
+        """
+        from .serializers import ComplaintSerializer
+        with self._lock:
+            self._published_seqs[complaint.change_seq] = True
+            while len(self._published_seqs) > PUBLISHED_SEQS_TO_REMEMBER:
+                self._published_seqs.popitem(last=False)
+            if event_type == COMPLAINT_CLOSED:
+                self._closed_ids[complaint.id] = True
+                while len(self._closed_ids) > PUBLISHED_SEQS_TO_REMEMBER:
+                    self._closed_ids.popitem(last=False)
+        if not self.has_subscribers():
+            return
+        self.publish(complaint_channels(complaint), {
+            'type': event_type,
+            'change_seq': complaint.change_seq,
+            'complaint': ComplaintSerializer(complaint).data,
+        })
+
+    def was_published(self, change_seq):
+        with self._lock:
+            return change_seq in self._published_seqs
+
+    def was_announced_closed(self, complaint_id):
+        with self._lock:
+            return complaint_id in self._closed_ids
+
+broadcaster = ComplaintBroadcaster()
+
+def publish_complaints(event_type, complaints):
+    """
+    Publishes events for complaints written without model signals, e.g. bulk_create in loaders.
+    Call after the transaction commits.
+    """
+    for complaint in complaints:
+        broadcaster.publish_complaint(event_type, complaint)
+
+class ChangeFeedRelay:
+    """
+    Publishes complaint writes made by other processes, by following the change
+    sequence every settings.SSE_RELAY_INTERVAL seconds while there are subscribers.
+    Rows created since the relay started become complaint.created events. Changed
+    rows become complaint.closed events when they closed since the previous poll:
+    their closedate is not older than that poll's day and no close was announced for
+    them yet. Every other change becomes a complaint.updated event.
+    """
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self._task = None
+
+    def ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    def _snapshot(self):
+        from .utils.change_utils import current_change_seq
+        using = router.db_for_read(Complaint)
+        last_id = Complaint.objects.using(using).order_by('-id').values_list('id', flat=True).first() or 0
+        return current_change_seq(using), last_id, timezone.localdate()
+
+    def _poll(self, cursor, last_id, since):
+        """
+        Publishes the rows changed after cursor.
+
+        @param since - Day of the previous poll. closedate is a date, so a complaint
+                       closed before that day was already closed at the previous poll
+
+        @return tuple - The cursor, last_id and since to pass to the next poll
+        """
+        from .utils.change_utils import current_change_seq
+        using = router.db_for_read(Complaint)
+        today = timezone.localdate()
+        current = current_change_seq(using)
+        if current == cursor:
+            return cursor, last_id, today
+        changed = (Complaint.objects.using(using)
+          .filter(change_seq__gt=cursor, change_seq__lte=current)
+          .order_by('change_seq')
+        )
+        for complaint in changed.iterator():
+            if self.broadcaster.was_published(complaint.change_seq):
+                continue
+            if complaint.id > last_id:
+                event_type = COMPLAINT_CREATED
+            elif (complaint.closedate is not None and complaint.closedate >= since
+                  and not self.broadcaster.was_announced_closed(complaint.id)):
+                event_type = COMPLAINT_CLOSED
+            else:
+                event_type = COMPLAINT_UPDATED
+            self.broadcaster.publish_complaint(event_type, complaint)
+            last_id = max(last_id, complaint.id)
+        return current, last_id, today
+
+    async def _run(self):
+        state = await sync_to_async(self._snapshot)()
+        while self.broadcaster.has_subscribers():
+            await asyncio.sleep(settings.SSE_RELAY_INTERVAL)
+            state = await sync_to_async(self._poll)(*state)
+
+relay = ChangeFeedRelay(broadcaster)
@@ -0,0 +1,220 @@
+"""
+Database-backed job queue for heavy exports and reports.
+
+The API submits ReportJob rows, `manage.py run_workers` claims and executes them
+in a local process pool, and results are written to REPORT_JOB_RESULT_DIR until
+they expire. No broker is needed: the job table is the queue.
+"""
+import json
+import os
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from .models import Complaint, ReportJob
+from .utils.query_utils import get_district_complaints, STATUS_FILTERS
+from .utils.export_utils import iter_export_chunks, EXPORT_CONTENT_TYPES
+
+def _result_path(job, extension):
+    os.makedirs(settings.REPORT_JOB_RESULT_DIR, exist_ok=True)
+    return os.path.join(settings.REPORT_JOB_RESULT_DIR, f"{job.kind}_{job.id}.{extension}")
+
+def run_export_job(job):
+    """
+    Writes a district export to disk.
+    params: filter_field, district, status, file_format (see ComplaintExportViewSet)
+    """
+    params = job.params
+    export_format = params.get('file_format', 'csv')
+    complaints = get_district_complaints(params['filter_field'], params['district'], params.get('status', 'all'))
+    path = _result_path(job, export_format)
+    with open(path, 'wb') as result_file:
+        for chunk in iter_export_chunks(complaints, export_format):
+            result_file.write(chunk)
+    return path, EXPORT_CONTENT_TYPES[export_format]
+
+def run_council_report_job(job):
+    """
+    Writes per-district totals and top 3 complaint types for every district as JSON.
+    params: filter_field (defaults to 'account')
+    """
+    filter_field = job.params.get('filter_field', 'account')
+    districts = {}
+    totals = (Complaint.objects
+      .exclude(**{f'{filter_field}__isnull': True})
+      .values(filter_field)
+      .annotate(
+        total=Count('id'),
+        open=Count('id', filter=Q(**STATUS_FILTERS['open'])),
+        closed=Count('id', filter=Q(**STATUS_FILTERS['closed'])),
+      )
+      .order_by(filter_field)
+    )
+    for row in totals:
+        districts[row[filter_field]] = {
+            'total': row['total'],
+            'open': row['open'],
+            'closed': row['closed'],
+            'top_complaints': [],
+        }
+
+    type_counts = (Complaint.objects
+      .exclude(**{f'{filter_field}__isnull': True})
+      .values(filter_field, 'complaint_type')
+      .annotate(count=Count('complaint_type'))
+      .order_by(filter_field, '-count')
+    )
+    for row in type_counts:
+        top_complaints = districts[row[filter_field]]['top_complaints']
+        if len(top_complaints) < 3:
+            top_complaints.append({'complaint_type': row['complaint_type'], 'count': row['count']})
+
+    path = _result_path(job, 'json')
+    with open(path, 'w') as result_file:
+        json.dump({'filter_field': filter_field, 'districts': districts}, result_file)
+    return path, 'application/json'
+
+JOB_HANDLERS = {
+    ReportJob.KIND_EXPORT: run_export_job,
+    ReportJob.KIND_COUNCIL_REPORT: run_council_report_job,
+}
+
+def submit_job(kind, params=None, user=None):
+    """
+    Queues a job for the workers.
+
+    @param kind - One of JOB_HANDLERS
+    @param params - JSON-serializable handler parameters
+    @param user - Owner of the job, if submitted through the API
+
+    @return ReportJob - The queued job
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    return ReportJob.objects.create(
+        kind=kind,
+        params=params or {},
+        user=user,
+        max_attempts=settings.REPORT_JOB_MAX_ATTEMPTS,
+    )
+
+def claim_next_job():
+    """
+    Atomically moves the oldest runnable queued job to running.
+    The claim is a conditional UPDATE, so concurrent schedulers never claim the same job.
+
+    @return ReportJob or None - The claimed job, or None if nothing is runnable
+    """
+    now = timezone.now()
+    candidates = (ReportJob.objects
+      .filter(status=ReportJob.STATUS_QUEUED, available_at__lte=now)
+      .order_by('available_at', 'id')
+      .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_QUEUED).update(
+            status=ReportJob.STATUS_RUNNING,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return ReportJob.objects.get(id=job_id)
+    return None
+
+def execute_job(job_id):
+    """
+    Runs a claimed job and records the outcome. Failed attempts are requeued with
+    linear backoff until max_attempts is reached. Safe to call in a worker process.
+
+    @param job_id - Id of a job in the running state
+
+    @return str - The job's final status for this attempt
+    """
+    job = ReportJob.objects.get(id=job_id)
+    now = timezone.now
+    try:
+        path, content_type = JOB_HANDLERS[job.kind](job)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = ReportJob.STATUS_QUEUED
+            job.available_at = now() + timedelta(seconds=settings.REPORT_JOB_RETRY_BACKOFF * job.attempts)
+        else:
+            job.status = ReportJob.STATUS_FAILED
+            job.finished_at = now()
+        job.save(update_fields=['error', 'status', 'available_at', 'finished_at'])
+        return job.status
+
+    job.status = ReportJob.STATUS_SUCCEEDED
+    job.error = ""
+    job.result_path = path
+    job.result_content_type = content_type
+    job.finished_at = now()
+    job.expires_at = job.finished_at + timedelta(seconds=settings.REPORT_JOB_RESULT_TTL)
+    job.save(update_fields=['status', 'error', 'result_path', 'result_content_type', 'finished_at', 'expires_at'])
+    return job.status
+
+def requeue_crashed_job(job_id, error):
+    """
+    Records a failed attempt for a running job whose worker died before it could
+    report back: requeued with backoff, or failed once out of attempts.
+
+    @return str - The job's new status
+    """
+    job = ReportJob.objects.get(id=job_id)
+    if job.status != ReportJob.STATUS_RUNNING:
+        return job.status
+    job.error = error
+    if job.attempts < job.max_attempts:
+        job.status = ReportJob.STATUS_QUEUED
+        job.available_at = timezone.now() + timedelta(seconds=settings.REPORT_JOB_RETRY_BACKOFF * job.attempts)
+    else:
+        job.status = ReportJob.STATUS_FAILED
+        job.finished_at = timezone.now()
+    job.save(update_fields=['error', 'status', 'available_at', 'finished_at'])
+    return job.status
+
+def heartbeat_jobs(job_ids):
+    """
+    Marks running jobs as still owned by a live scheduler, see requeue_stale_jobs.
+
+    @param job_ids - Ids of the jobs the caller is running
+    """
+    if job_ids:
+        ReportJob.objects.filter(id__in=job_ids, status=ReportJob.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+
+def requeue_stale_jobs():
+    """
+    Returns jobs whose scheduler stopped sending heartbeats (e.g. its host was
+    killed) to the queue, or fails them if they have no attempts left. A job that
+    merely runs long keeps its heartbeat; run_workers stops it at REPORT_JOB_TIMEOUT.
+
+    @return int - Number of jobs requeued
+    """
+    now = timezone.now()
+    last_seen = now - timedelta(seconds=settings.REPORT_JOB_HEARTBEAT_TIMEOUT)
+    stale = ReportJob.objects.filter(
+        # Jobs claimed before heartbeats existed count from their start
+        Q(heartbeat_at__lt=last_seen) | Q(heartbeat_at__isnull=True, started_at__lt=last_seen),
+        status=ReportJob.STATUS_RUNNING,
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=ReportJob.STATUS_FAILED, error="Scheduler stopped responding", finished_at=now
+    )
+    return stale.update(status=ReportJob.STATUS_QUEUED, available_at=now)
+
+def expire_job_results():
+    """
+    Deletes result files past their expiry and marks those jobs expired.
+
+    @return int - Number of jobs expired
+    """
+    expired = ReportJob.objects.filter(status=ReportJob.STATUS_SUCCEEDED, expires_at__lt=timezone.now())
+    count = 0
+    for job in expired.only('id', 'result_path'):
+        if job.result_path and os.path.exists(job.result_path):
+            os.remove(job.result_path)
+        count += ReportJob.objects.filter(id=job.id).update(status=ReportJob.STATUS_EXPIRED, result_path="")
+    return count
@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone
+from complaint_app.utils.archive_utils import get_archivable_complaints, archive_batch
+from complaint_app.utils.sqlite_utils import retry_on_locked
+
+class Command(BaseCommand):
+  help = "Moves closed complaints older than the archive horizon to the archive table, in batches"
+
+  def add_arguments(self, parser):
+    parser.add_argument('--older-than-days', type=int, default=settings.ARCHIVE_HORIZON_DAYS,
+      help="Archive complaints closed more than this many days ago")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true',
+      help="Only report how many complaints would be archived")
+
+  def handle(self, *args, **options):
+    cutoff = timezone.now().date() - timedelta(days=options['older_than_days'])
+    if options['dry_run']:
+      count = get_archivable_complaints(cutoff).count()
+      self.stdout.write(f"{count} complaint(s) closed before {cutoff} would be archived")
+      return
+
+    total = 0
+    while True:
+      # Each batch is its own short transaction so readers are never blocked for long
+      moved = retry_on_locked(lambda: archive_batch(cutoff, options['batch_size']), (OperationalError,))
+      if not moved:
+        break
+      total += moved
+      self.stdout.write(f"Archived {total} complaint(s)...")
+    self.stdout.write(f"Archived {total} complaint(s) closed before {cutoff}")
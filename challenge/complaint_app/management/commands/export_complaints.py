@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from complaint_app.utils.string_utils import format_district_number
+from complaint_app.utils.query_utils import get_district_complaints, STATUS_FILTERS
+from complaint_app.utils.export_utils import iter_export_chunks, EXPORT_WRITERS, EXPORT_CHUNK_SIZE, ExportFormatUnavailable
+
+class Command(BaseCommand):
+  help = "Streams a district's complaints to a CSV or Parquet file in bounded-memory chunks"
+
+  def add_arguments(self, parser):
+    parser.add_argument('district', help="Council district number, e.g. 1 or 42")
+    parser.add_argument('output', help="Path of the file to write")
+    parser.add_argument('--format', dest='export_format', choices=list(EXPORT_WRITERS), default='csv')
+    parser.add_argument('--status', dest='case_status', choices=list(STATUS_FILTERS), default='all')
+    parser.add_argument('--constituent', action='store_true',
+      help="Export complaints from constituents living in the district (council_dist) instead of the district's account")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+  def handle(self, *args, **options):
+    try:
+      padded_district = format_district_number(options['district'])
+    except ValueError:
+      raise CommandError(f"Invalid district '{options['district']}'")
+    filter_field = 'council_dist' if options['constituent'] else 'account'
+
+    complaints = get_district_complaints(filter_field, padded_district, options['case_status'])
+    try:
+      chunks = iter_export_chunks(complaints, options['export_format'], options['chunk_size'])
+    except ExportFormatUnavailable as e:
+      raise CommandError(str(e))
+
+    written = 0
+    with open(options['output'], 'wb') as output_file:
+      for chunk in chunks:
+        output_file.write(chunk)
+        written += len(chunk)
+    self.stdout.write(f"Wrote {written} bytes to {options['output']}")
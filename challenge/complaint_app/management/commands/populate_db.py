@@ -1,13 +1,29 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from django.db import OperationalError, transaction
 from complaint_app.models import UserProfile, Complaint
+from complaint_app.utils.sqlite_utils import retry_on_locked
+from complaint_app.utils.change_utils import reserve_change_seqs
+from complaint_app.utils.heatmap_utils import rebuild_complaint_aggregates
+from complaint_app.events import publish_complaints, COMPLAINT_CREATED
+from complaint_app.management.commands.warm_cache import check_cache_is_shared
 import os.path
 import json
 
+BATCH_SIZE = 500
+
 class Command(BaseCommand):
   help = "Seeds database with users, and complaints"
 
+  def add_arguments(self, parser):
+    parser.add_argument('--warm-cache', action='store_true',
+      help="Run warm_cache once the complaints are loaded")
+
   def handle(self, *args, **options):
+    if options['warm_cache']:
+      # Fail before loading rather than after
+      check_cache_is_shared()
     BASE = os.path.dirname(os.path.abspath(__file__))
     cm_json = os.path.join(BASE, "councilMembers.json")
     with open(cm_json) as json_file:
@@ -33,19 +49,39 @@ class Command(BaseCommand):
     complaints_json = os.path.join(BASE, "data.json")
     with open(complaints_json) as json_file:
       data = json.load(json_file)
-      for complaint in data:
-        Complaint.objects.create(
-          unique_key = complaint['unique_key'],
-          account = complaint['account'],
-          opendate = complaint['opendate'].replace('T00:00:00.000',''),
-          complaint_type = complaint['complaint_type'] if 'complaint_type' in complaint else None,
-          descriptor = complaint['descriptor'] if 'descriptor' in complaint else None,
-          zip = complaint['zip'] if 'zip' in complaint else None,
-          borough = complaint['borough'] if 'borough' in complaint else None,
-          city = complaint['city'] if 'city' in complaint else None,
-          council_dist = complaint['council_dist'] if 'council_dist' in complaint else None,
-          community_board = complaint['community_board'] if 'community_board' in complaint else None,
-          closedate = complaint['closedate'].replace('T00:00:00.000','') if 'closedate' in complaint else None
-        )
+      # Commit in batches so concurrent readers are only locked out briefly,
+      # and retry a batch if another connection holds the write lock
+      for start in range(0, len(data), BATCH_SIZE):
+        batch = data[start:start + BATCH_SIZE]
+        retry_on_locked(lambda: self.create_complaints(batch), (OperationalError,))
+      rebuild_complaint_aggregates()
       print('Finished populating complaints')
 
+    if options['warm_cache']:
+      call_command('warm_cache', stdout=self.stdout)
+
+  @transaction.atomic
+  def create_complaints(self, complaints):
+    # bulk_create skips the Complaint signals, so number the batch here and
+    # rebuild the heatmap aggregates once loading is done
+    change_seqs = reserve_change_seqs(len(complaints))
+    created = Complaint.objects.bulk_create([
+      Complaint(
+        unique_key = complaint['unique_key'],
+        account = complaint['account'],
+        opendate = complaint['opendate'].replace('T00:00:00.000',''),
+        complaint_type = complaint['complaint_type'] if 'complaint_type' in complaint else None,
+        descriptor = complaint['descriptor'] if 'descriptor' in complaint else None,
+        zip = complaint['zip'] if 'zip' in complaint else None,
+        borough = complaint['borough'] if 'borough' in complaint else None,
+        city = complaint['city'] if 'city' in complaint else None,
+        council_dist = complaint['council_dist'] if 'council_dist' in complaint else None,
+        community_board = complaint['community_board'] if 'community_board' in complaint else None,
+        closedate = complaint['closedate'].replace('T00:00:00.000','') if 'closedate' in complaint else None,
+        change_seq = change_seq
+      )
+      for complaint, change_seq in zip(complaints, change_seqs)
+    ])
+    # Let live event stream subscribers in this process know (other processes pick
+    # the batch up from the change feed)
+    transaction.on_commit(lambda: publish_complaints(COMPLAINT_CREATED, created))
@@ -0,0 +1,37 @@
+import os
+import pstats
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from complaint_app.utils.profiling_utils import list_profile_dumps, make_profile_token
+
+class Command(BaseCommand):
+  help = "Summarizes the top cumulative hotspots across the request profiles written by RequestProfilingMiddleware"
+
+  def add_arguments(self, parser):
+    parser.add_argument('--dir', default=settings.REQUEST_PROFILING_DIR, help="Directory holding the .prof dumps")
+    parser.add_argument('--route', default='', help="Only dumps whose route or district label contains this text")
+    parser.add_argument('--limit', type=int, default=25, help="Number of functions to list")
+    parser.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'])
+    parser.add_argument('--issue-token', action='store_true',
+      help=f"Print a signed {settings.REQUEST_PROFILING_HEADER} header value instead, to profile chosen requests")
+
+  def handle(self, *args, **options):
+    if options['issue_token']:
+      self.stdout.write(make_profile_token())
+      return
+
+    dumps = [path for path in list_profile_dumps(options['dir']) if options['route'] in os.path.basename(path)]
+    if not dumps:
+      self.stdout.write(f"No profiles found in {options['dir']}")
+      return
+
+    # Dump names are <timestamp>_<route>_<district>_<duration>_<pid>.prof
+    labels = Counter('_'.join(os.path.basename(path).split('_')[1:3]) for path in dumps)
+    self.stdout.write(f"{len(dumps)} profile(s):")
+    for label, count in labels.most_common():
+      self.stdout.write(f"  {count:>5}  {label}")
+    self.stdout.write("")
+
+    stats = pstats.Stats(*dumps, stream=self.stdout)
+    stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
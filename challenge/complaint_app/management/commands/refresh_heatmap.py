@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from complaint_app.utils.heatmap_utils import rebuild_complaint_aggregates
+import time
+
+class Command(BaseCommand):
+  help = "Rebuilds the precomputed heatmap aggregates from the complaint and archive tables"
+
+  def handle(self, *args, **options):
+    started = time.perf_counter()
+    rows = rebuild_complaint_aggregates()
+    self.stdout.write(f"Rebuilt {rows} aggregate rows in {time.perf_counter() - started:.2f}s")
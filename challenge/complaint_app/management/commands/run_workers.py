@@ -0,0 +1,140 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from complaint_app.jobs import (
+  claim_next_job, execute_job, heartbeat_jobs, requeue_crashed_job, requeue_stale_jobs, expire_job_results
+)
+from complaint_app.workers import init_worker, run_job
+import multiprocessing
+import os
+import time
+
+class Command(BaseCommand):
+  help = "Runs queued report jobs in a local process pool"
+
+  def add_arguments(self, parser):
+    parser.add_argument('--workers', type=int, default=2,
+      help="Maximum number of jobs running at once. 0 runs jobs inline in this process, "
+        "without heartbeats or REPORT_JOB_TIMEOUT while a job runs.")
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+      help="Seconds to sleep when the queue is empty")
+    parser.add_argument('--once', action='store_true',
+      help="Exit once the queue is drained instead of polling forever")
+
+  def handle(self, *args, **options):
+    if options['workers'] <= 0:
+      self.run_inline(options)
+    else:
+      self.run_pool(options)
+
+  def housekeeping(self, running_ids=()):
+    # Heartbeat our own jobs first, so the stale check only catches other schedulers' jobs
+    heartbeat_jobs(list(running_ids))
+    requeued = requeue_stale_jobs()
+    if requeued:
+      self.stdout.write(f"Requeued {requeued} stale job(s)")
+    expired = expire_job_results()
+    if expired:
+      self.stdout.write(f"Expired {expired} job result(s)")
+
+  def run_inline(self, options):
+    while True:
+      self.housekeeping()
+      job = claim_next_job()
+      if job is None:
+        if options['once']:
+          return
+        time.sleep(options['poll_interval'])
+        continue
+      self.stdout.write(f"Job {job.id} ({job.kind}): {execute_job(job.id)}")
+
+  def create_pool(self, max_workers):
+    # Children must not inherit the parent's open database connections
+    connections.close_all()
+    return ProcessPoolExecutor(
+      max_workers=max_workers,
+      mp_context=multiprocessing.get_context('spawn'),
+      initializer=init_worker,
+      initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+    )
+
+  def job_crashed(self, job, error):
+    status = requeue_crashed_job(job.id, f"Worker process died: {error}")
+    self.stderr.write(f"Job {job.id} ({job.kind}) crashed: {error}, now {status}")
+
+  def stop_overrunning_jobs(self, pool, in_flight):
+    """
+    Stops the pool if any of its jobs ran past REPORT_JOB_TIMEOUT. A pool cannot
+    cancel a call that already started, so its processes are terminated, which
+    breaks the pool: the overrunning jobs are recorded as timed out, and the jobs
+    stopped along with them are requeued like after a crash.
+
+    @return bool - Whether the pool was stopped
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    overrunning = [job for future, job in in_flight.items() if not future.done() and job.started_at <= deadline]
+    if not overrunning:
+      return False
+    for job in overrunning:
+      status = requeue_crashed_job(job.id, f"Timed out after {settings.REPORT_JOB_TIMEOUT}s")
+      self.stderr.write(f"Job {job.id} ({job.kind}) timed out, now {status}")
+    for process in list(pool._processes.values()):
+      process.terminate()
+    return True
+
+  def run_pool(self, options):
+    max_workers = options['workers']
+    pool = self.create_pool(max_workers)
+    in_flight = {}
+    try:
+      while True:
+        self.housekeeping(job.id for job in in_flight.values())
+        broken = self.stop_overrunning_jobs(pool, in_flight)
+        # Only claim what the pool can start right away, so queued jobs stay
+        # visible (and claimable) to other worker hosts
+        while not broken and len(in_flight) < max_workers:
+          job = claim_next_job()
+          if job is None:
+            break
+          try:
+            in_flight[pool.submit(run_job, job.id)] = job
+          except BrokenProcessPool as e:
+            self.job_crashed(job, e)
+            broken = True
+            break
+
+        if not in_flight and not broken:
+          if options['once']:
+            return
+          time.sleep(options['poll_interval'])
+          continue
+
+        done, _ = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+        for future in done:
+          job = in_flight.pop(future)
+          try:
+            self.stdout.write(f"Job {job.id} ({job.kind}): {future.result()}")
+          except Exception as e:
+            # execute_job records handler errors itself, so this is the worker failing
+            self.job_crashed(job, e)
+            broken = broken or isinstance(e, BrokenProcessPool)
+
+        if broken:
+          # A dead worker breaks the whole pool and every job still in it.
+          # Requeue those jobs now rather than after REPORT_JOB_TIMEOUT, and
+          # start over with fresh processes
+          wait(in_flight)
+          for future, job in in_flight.items():
+            if future.exception() is None:
+              self.stdout.write(f"Job {job.id} ({job.kind}): {future.result()}")
+            else:
+              self.job_crashed(job, future.exception())
+          in_flight = {}
+          pool.shutdown(wait=True)
+          pool = self.create_pool(max_workers)
+    finally:
+      pool.shutdown(wait=True)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from complaint_app.utils.cache_utils import warm_all_districts, get_council_districts, is_cache_process_local
+import time
+
+PROCESS_LOCAL_CACHE_ERROR = (
+  "The complaint cache lives inside each process ({backend}), so warming it from a command "
+  "is lost when the command exits. Set COMPLAINT_CACHE_BACKEND/COMPLAINT_CACHE_LOCATION to a "
+  "shared backend, or warm each web worker with WARM_CACHE_ON_STARTUP=true."
+)
+
+def check_cache_is_shared():
+  if is_cache_process_local():
+    raise CommandError(PROCESS_LOCAL_CACHE_ERROR.format(
+      backend=settings.CACHES[settings.COMPLAINT_CACHE_ALIAS]['BACKEND']
+    ))
+
+class Command(BaseCommand):
+  help = "Precomputes the dashboard summary, top complaint types and default lists of every council district, in normal and constituent mode"
+
+  def add_arguments(self, parser):
+    parser.add_argument('--workers', type=int, default=settings.WARM_CACHE_WORKERS, help="Districts warmed in parallel")
+    parser.add_argument('--district', action='append', dest='districts',
+      help="Only warm this district, in NYCC format (repeatable)")
+
+  def handle(self, *args, **options):
+    check_cache_is_shared()
+    districts = options['districts'] or get_council_districts()
+    started = time.perf_counter()
+    for padded_district, seconds in warm_all_districts(options['workers'], districts):
+      self.stdout.write(f"{padded_district}  {seconds:.3f}s")
+    self.stdout.write(f"Warmed {len(districts)} district(s) in {time.perf_counter() - started:.2f}s")
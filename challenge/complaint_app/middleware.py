@@ -0,0 +1,113 @@
+import cProfile
+import os
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.utils import timezone
+from .utils.string_utils import format_district_number
+from .utils.profiling_utils import is_valid_profile_token, profile_dump_name, rotate_profile_dumps
+
+class RequestProfilingMiddleware:
+    """
+    Profiles a sample of requests with cProfile (REQUEST_PROFILING_SAMPLE_RATE), plus any
+    request carrying a valid signed REQUEST_PROFILING_HEADER, and writes each profile to
+    REQUEST_PROFILING_DIR labelled with the route and the user's district. Only the newest
+    REQUEST_PROFILING_MAX_FILES dumps are kept; `manage.py profile_summary` reads them.
+
+    With REQUEST_PROFILING_ENABLED off the middleware removes itself from the chain
+    at startup, so it costs nothing per request.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.REQUEST_PROFILING_HEADER.upper().replace('-', '_')
+
+    def should_profile(self, request):
+        token = request.META.get(self.header)
+        if token is not None:
+            return is_valid_profile_token(token, settings.REQUEST_PROFILING_TOKEN_MAX_AGE)
+        return random.random() < settings.REQUEST_PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return self.get_response(request)
+        started = timezone.now()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        self.dump(profiler, request, started, time.perf_counter() - start)
+        return response
+
+    def dump(self, profiler, request, started, duration):
+        match = request.resolver_match
+        route = match.route if match is not None else request.path
+        directory = settings.REQUEST_PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, profile_dump_name(started, route, self.district(request), duration)))
+        rotate_profile_dumps(directory, settings.REQUEST_PROFILING_MAX_FILES)
+
+    def district(self, request):
+        # DRF copies the token-authenticated user onto the Django request
+        user = getattr(request, 'user', None)
+        profile = getattr(user, 'userprofile', None) if user is not None and user.is_authenticated else None
+        if profile is None:
+            return None
+        label = format_district_number(profile.district)
+        if request.GET.get('constituent', '').lower() == 'true':
+            label += '-constituent'
+        return label
+
+class AdmissionControlMiddleware:
+    """
+    Caps how many heavy requests (views with throttle_scope 'heavy', i.e. the full
+    complaint lists and exports) a worker process serves at once, to
+    ADMISSION_HEAVY_CONCURRENCY. A heavy request that finds every slot taken waits up to
+    ADMISSION_QUEUE_TIMEOUT seconds, then gets a 503 with Retry-After instead of queueing
+    behind the others. Every other request skips admission entirely, so summary,
+    heatmap and top complaint calls keep their latency while heavy requests pile up.
+
+    Per-user request rates are limited separately by the DRF throttles in REST_FRAMEWORK.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.heavy_slots = threading.BoundedSemaphore(settings.ADMISSION_HEAVY_CONCURRENCY)
+
+    def __call__(self, request):
+        request._admission_slot = False
+        response = self.get_response(request)
+        if request._admission_slot:
+            if response.streaming:
+                # Hold the slot until the streamed body is fully sent (or abandoned)
+                response._resource_closers.append(self.heavy_slots.release)
+            else:
+                self.heavy_slots.release()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if getattr(view_class, 'throttle_scope', None) != 'heavy':
+            return None
+        if not self.heavy_slots.acquire(timeout=settings.ADMISSION_QUEUE_TIMEOUT):
+            response = JsonResponse(
+                {"error": "Too many large requests in progress, please retry shortly"},
+                status=503
+            )
+            response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+            return response
+        request._admission_slot = True
+        return None
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-19 08:50
+
+from collections import Counter
+from django.db import migrations, models
+
+
+def build_aggregates(apps, schema_editor):
+    Complaint = apps.get_model('complaint_app', 'Complaint')
+    ComplaintAggregate = apps.get_model('complaint_app', 'ComplaintAggregate')
+    db_alias = schema_editor.connection.alias
+    key_fields = ('account', 'council_dist', 'zip', 'community_board', 'complaint_type')
+
+    counts = Counter()
+    rows = Complaint.objects.using(db_alias).values_list(*key_fields, 'opendate', 'closedate')
+    for *key, opendate, closedate in rows.iterator():
+        status = 'closed' if closedate is not None else 'open' if opendate is not None else ''
+        counts[(*(value or '' for value in key), status)] += 1
+
+    ComplaintAggregate.objects.using(db_alias).bulk_create([
+        ComplaintAggregate(count=count, status=key[-1], **dict(zip(key_fields, key)))
+        for key, count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint_app', '0003_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintAggregate',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('account', models.CharField(blank=True, default='', max_length=10)),
+                ('council_dist', models.CharField(blank=True, default='', max_length=10)),
+                ('zip', models.CharField(blank=True, default='', max_length=5)),
+                ('community_board', models.CharField(blank=True, default='', max_length=150)),
+                ('complaint_type', models.CharField(blank=True, default='', max_length=150)),
+                ('status', models.CharField(blank=True, default='', max_length=10)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['council_dist'], name='complaint_a_council_b49689_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='complaintaggregate',
+            constraint=models.UniqueConstraint(fields=('account', 'council_dist', 'zip', 'community_board', 'complaint_type', 'status'), name='unique_complaint_aggregate_key'),
+        ),
+        migrations.RunPython(build_aggregates, migrations.RunPython.noop),
+    ]
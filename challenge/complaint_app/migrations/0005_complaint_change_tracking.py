@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-19 08:51
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_complaints(apps, schema_editor):
+    # Existing rows get their id as change sequence, so ?since=0 returns everything
+    Complaint = apps.get_model('complaint_app', 'Complaint')
+    ChangeCounter = apps.get_model('complaint_app', 'ChangeCounter')
+    db_alias = schema_editor.connection.alias
+    Complaint.objects.using(db_alias).update(change_seq=F('id'))
+    last_id = Complaint.objects.using(db_alias).aggregate(last_id=Max('id'))['last_id'] or 0
+    ChangeCounter.objects.using(db_alias).update_or_create(name='complaint', defaults={'value': last_id})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint_app', '0004_complaintaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ComplaintTombstone',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('unique_key', models.CharField(blank=True, default='', max_length=150)),
+                ('account', models.CharField(blank=True, default='', max_length=10, null=True)),
+                ('council_dist', models.CharField(blank=True, default='', max_length=10, null=True)),
+                ('change_seq', models.BigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(number_existing_complaints, migrations.RunPython.noop),
+    ]
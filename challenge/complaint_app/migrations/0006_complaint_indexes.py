@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint_app', '0005_complaint_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['account', 'closedate'], name='complaint_a_account_c54431_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['council_dist', 'closedate'], name='complaint_a_council_c23420_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['complaint_type'], name='complaint_a_complai_1367c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['unique_key'], name='complaint_a_unique__efab42_idx'),
+        ),
+    ]
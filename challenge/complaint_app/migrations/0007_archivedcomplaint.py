@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-19 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint_app', '0006_complaint_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComplaint',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('unique_key', models.CharField(blank=True, default='', max_length=150)),
+                ('account', models.CharField(blank=True, default='', max_length=10, null=True)),
+                ('opendate', models.DateField(blank=True, null=True)),
+                ('complaint_type', models.CharField(blank=True, default='', max_length=150, null=True)),
+                ('descriptor', models.CharField(blank=True, default='', max_length=150, null=True)),
+                ('zip', models.CharField(blank=True, default='', max_length=5, null=True)),
+                ('borough', models.CharField(blank=True, default='', max_length=50, null=True)),
+                ('city', models.CharField(blank=True, default='', max_length=50, null=True)),
+                ('council_dist', models.CharField(blank=True, default='', max_length=10, null=True)),
+                ('community_board', models.CharField(blank=True, default='', max_length=150, null=True)),
+                ('closedate', models.DateField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'opendate'], name='complaint_a_account_447b51_idx'), models.Index(fields=['council_dist', 'opendate'], name='complaint_a_council_d80afb_idx'), models.Index(fields=['closedate'], name='complaint_a_closeda_192248_idx')],
+            },
+        ),
+    ]
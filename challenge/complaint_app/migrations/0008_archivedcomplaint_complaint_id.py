@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-19 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint_app', '0007_archivedcomplaint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='complaint_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
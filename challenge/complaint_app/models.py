@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 # Create your models here.
 
 # Create your models here.
@@ -26,5 +27,150 @@ class Complaint(models.Model):
   council_dist = models.CharField(max_length=10, blank=True, default="", null=True)
   community_board = models.CharField(max_length=150, blank=True, default="", null=True)
   closedate = models.DateField(blank=True, null=True)
+  # Change tracking for delta sync (?since=<cursor>), assigned on every write, see utils/change_utils.py
+  updated_at = models.DateTimeField(auto_now=True, db_index=True, null=True)
+  change_seq = models.BigIntegerField(default=0, db_index=True)
+
+  class Meta:
+    # Back the district/type filters and unique_key lookups used by the API and admin
+    indexes = [
+      models.Index(fields=['account', 'closedate']),
+      models.Index(fields=['council_dist', 'closedate']),
+      models.Index(fields=['complaint_type']),
+      models.Index(fields=['unique_key']),
+    ]
+
+  def save(self, *args, **kwargs):
+    # The change sequence is reserved in pre_save; committing it together with the
+    # row keeps readers from seeing a cursor before the row it numbers
+    with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Complaint, instance=self)):
+      super().save(*args, **kwargs)
+  def __str__(self):
+    return str(self.unique_key)
+
+class ArchivedComplaint(models.Model):
+  # Closed complaints moved out of the hot Complaint table by `manage.py archive_complaints`.
+  # Same columns as Complaint; list endpoints only read it when asked (include_archive
+  # or an opened_after/opened_before range reaching back into archived dates).
+  id = models.BigAutoField(primary_key=True)
+  unique_key = models.CharField(max_length=150, blank=True, default="")
+  account = models.CharField(max_length=10, blank=True, default="", null=True)
+  opendate = models.DateField(blank=True, null=True)
+  complaint_type = models.CharField(max_length=150, blank=True, default="", null=True)
+  descriptor = models.CharField(max_length=150, blank=True, default="", null=True)
+  zip = models.CharField(max_length=5, blank=True, default="", null=True)
+  borough = models.CharField(max_length=50, blank=True, default="", null=True)
+  city = models.CharField(max_length=50, blank=True, default="", null=True)
+  council_dist = models.CharField(max_length=10, blank=True, default="", null=True)
+  community_board = models.CharField(max_length=150, blank=True, default="", null=True)
+  closedate = models.DateField(blank=True, null=True)
+  archived_at = models.DateTimeField(auto_now_add=True)
+  # Id the complaint had in the hot table, telling a deleted complaint from an archived one
+  complaint_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+
+  class Meta:
+    indexes = [
+      models.Index(fields=['account', 'opendate']),
+      models.Index(fields=['council_dist', 'opendate']),
+      models.Index(fields=['closedate']),
+    ]
+
+  def __str__(self):
+    return str(self.unique_key)
+
+class ChangeCounter(models.Model):
+  # Single-row counter handing out monotonic Complaint change sequence numbers.
+  # Incrementing it row-locks the counter until the writing transaction commits,
+  # so sequence numbers become visible in order.
+  name = models.CharField(max_length=50, primary_key=True)
+  value = models.BigIntegerField(default=0)
+  def __str__(self):
+    return f"{self.name}: {self.value}"
+
+class ComplaintTombstone(models.Model):
+  # Records a complaint leaving a district (deleted, or moved to another district)
+  # so delta sync clients can drop it
+  id = models.BigAutoField(primary_key=True)
+  unique_key = models.CharField(max_length=150, blank=True, default="")
+  account = models.CharField(max_length=10, blank=True, default="", null=True)
+  council_dist = models.CharField(max_length=10, blank=True, default="", null=True)
+  change_seq = models.BigIntegerField(db_index=True)
+  deleted_at = models.DateTimeField(auto_now_add=True)
+  def __str__(self):
+    return f"{self.unique_key} @ {self.change_seq}"
+
+class ReportJob(models.Model):
+  # Heavy exports and reports queued by the API and executed by `manage.py run_workers`
+  KIND_EXPORT = 'export'
+  KIND_COUNCIL_REPORT = 'council_report'
+  KIND_CHOICES = [
+    (KIND_EXPORT, 'District export'),
+    (KIND_COUNCIL_REPORT, 'Council-wide report'),
+  ]
+
+  STATUS_QUEUED = 'queued'
+  STATUS_RUNNING = 'running'
+  STATUS_SUCCEEDED = 'succeeded'
+  STATUS_FAILED = 'failed'
+  STATUS_EXPIRED = 'expired'
+  STATUS_CHOICES = [
+    (STATUS_QUEUED, 'Queued'),
+    (STATUS_RUNNING, 'Running'),
+    (STATUS_SUCCEEDED, 'Succeeded'),
+    (STATUS_FAILED, 'Failed'),
+    (STATUS_EXPIRED, 'Expired'),
+  ]
+
+  id = models.BigAutoField(primary_key=True)
+  user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+  kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+  params = models.JSONField(default=dict, blank=True)
+  status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+  attempts = models.PositiveIntegerField(default=0)
+  max_attempts = models.PositiveIntegerField(default=3)
+  error = models.TextField(blank=True, default="")
+  result_path = models.CharField(max_length=500, blank=True, default="")
+  result_content_type = models.CharField(max_length=100, blank=True, default="")
+  created_at = models.DateTimeField(auto_now_add=True)
+  available_at = models.DateTimeField(default=timezone.now)
+  started_at = models.DateTimeField(blank=True, null=True)
+  # Refreshed by the scheduler running the job; a stale heartbeat means that scheduler died
+  heartbeat_at = models.DateTimeField(blank=True, null=True)
+  finished_at = models.DateTimeField(blank=True, null=True)
+  expires_at = models.DateTimeField(blank=True, null=True)
+
+  class Meta:
+    indexes = [
+      models.Index(fields=['status', 'available_at']),
+    ]
+
+  def __str__(self):
+    return f"{self.kind} #{self.id} ({self.status})"
+
+class ComplaintAggregate(models.Model):
+  # Precomputed complaint counts backing the heatmap endpoint, one row per distinct
+  # (district, location, type, status). Kept current by the Complaint signals in
+  # signals.py; `manage.py refresh_heatmap` rebuilds it after bulk loads.
+  # Missing values are stored as "" so the unique constraint also covers them.
+  id = models.BigAutoField(primary_key=True)
+  account = models.CharField(max_length=10, blank=True, default="")
+  council_dist = models.CharField(max_length=10, blank=True, default="")
+  zip = models.CharField(max_length=5, blank=True, default="")
+  community_board = models.CharField(max_length=150, blank=True, default="")
+  complaint_type = models.CharField(max_length=150, blank=True, default="")
+  status = models.CharField(max_length=10, blank=True, default="")
+  count = models.IntegerField(default=0)
+
+  class Meta:
+    constraints = [
+      models.UniqueConstraint(
+        fields=['account', 'council_dist', 'zip', 'community_board', 'complaint_type', 'status'],
+        name='unique_complaint_aggregate_key'
+      ),
+    ]
+    indexes = [
+      models.Index(fields=['council_dist']),
+    ]
+
   def __str__(self):
-    return str(self.unique_key)
\ No newline at end of file
+    return f"{self.account}/{self.council_dist} {self.zip} {self.complaint_type} {self.status}: {self.count}"
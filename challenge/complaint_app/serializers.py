@@ -1,5 +1,5 @@
 from django.contrib.auth.models import User
-from .models import UserProfile, Complaint
+from .models import UserProfile, Complaint, ReportJob
 from rest_framework import serializers
 
 class UserSerializer(serializers.ModelSerializer):
@@ -17,6 +17,20 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ('id','username', 'first_name', 'last_name','full_name','district','party','borough')
 
 class ComplaintSerializer(serializers.ModelSerializer):
+    # Optional `fields` argument limits the output to those fields (sparse fieldsets)
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
     class Meta:
         model = Complaint
         fields = ('unique_key','account','opendate','complaint_type','descriptor','zip','borough','city','council_dist','community_board','closedate')
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportJob
+        fields = ('id','kind','params','status','attempts','created_at','started_at','finished_at','expires_at')
+        read_only_fields = ('params','status','attempts','created_at','started_at','finished_at','expires_at')
@@ -0,0 +1,119 @@
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.db import transaction
+from .models import Complaint, ComplaintTombstone
+from .utils.sqlite_utils import SQLITE_PRAGMA_PROFILES, apply_sqlite_pragmas
+from .utils.heatmap_utils import AGGREGATE_KEY_FIELDS, complaint_aggregate_key, adjust_complaint_aggregate
+from .utils.change_utils import next_change_seq
+from .events import broadcaster, COMPLAINT_CREATED, COMPLAINT_CLOSED, COMPLAINT_UPDATED
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+  # Apply the SQLITE_PROFILE pragmas to every new SQLite connection
+  if connection.vendor != 'sqlite':
+    return
+  pragmas = SQLITE_PRAGMA_PROFILES[settings.SQLITE_PROFILE]
+  if pragmas:
+    apply_sqlite_pragmas(connection.connection, pragmas)
+
+_archiving = threading.local()
+
+@contextmanager
+def complaint_archiving():
+  # Deletes inside this block move complaints to the archive rather than removing them:
+  # the heatmap/summary aggregates keep counting them and no tombstones are written,
+  # so delta sync clients keep their copies
+  _archiving.active = True
+  try:
+    yield
+  finally:
+    _archiving.active = False
+
+def _is_archiving():
+  return getattr(_archiving, 'active', False)
+
+def _complaint_values(instance):
+  return {field: getattr(instance, field) for field in (*AGGREGATE_KEY_FIELDS, 'opendate', 'closedate')}
+
+@receiver(pre_save, sender=Complaint)
+def track_complaint_change(sender, instance, raw=False, using=None, **kwargs):
+  # Stamp the write with the next change sequence for delta sync, and remember the
+  # stored row: updates need it to know which aggregate and district the complaint is leaving
+  instance._previous_values = None
+  if raw:
+    return
+  instance.change_seq = next_change_seq(using)
+  if instance.pk is None:
+    return
+  instance._previous_values = (Complaint.objects.using(using)
+    .filter(pk=instance.pk)
+    .values('unique_key', *AGGREGATE_KEY_FIELDS, 'opendate', 'closedate')
+    .first()
+  )
+
+@receiver(post_save, sender=Complaint)
+def update_aggregates_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+  if raw:
+    return
+  key = complaint_aggregate_key(_complaint_values(instance))
+  previous = getattr(instance, '_previous_values', None)
+  previous_key = complaint_aggregate_key(previous) if previous is not None else None
+  if previous_key == key:
+    return
+  if previous_key is not None:
+    adjust_complaint_aggregate(previous_key, -1, using)
+  adjust_complaint_aggregate(key, 1, using)
+
+@receiver(post_save, sender=Complaint)
+def tombstone_moved_complaint(sender, instance, created, raw=False, using=None, **kwargs):
+  # A complaint moving to another district disappears from the old district's lists
+  previous = getattr(instance, '_previous_values', None)
+  if raw or previous is None:
+    return
+  moved_account = previous['account'] != instance.account
+  moved_council_dist = previous['council_dist'] != instance.council_dist
+  if moved_account or moved_council_dist:
+    # Only the district the complaint left gets the tombstone
+    ComplaintTombstone.objects.using(using).create(
+      unique_key=previous['unique_key'],
+      account=previous['account'] if moved_account else None,
+      council_dist=previous['council_dist'] if moved_council_dist else None,
+      change_seq=instance.change_seq
+    )
+
+@receiver(post_save, sender=Complaint)
+def publish_complaint_events(sender, instance, created, raw=False, using=None, **kwargs):
+  # Live stream: new complaints, complaints whose closedate was just set, and other
+  # changes (which the relay would otherwise pick up from the change feed anyway)
+  if raw:
+    return
+  previous = getattr(instance, '_previous_values', None)
+  if created:
+    event_type = COMPLAINT_CREATED
+  elif instance.closedate is not None and (previous is None or previous['closedate'] is None):
+    event_type = COMPLAINT_CLOSED
+  else:
+    event_type = COMPLAINT_UPDATED
+  transaction.on_commit(lambda: broadcaster.publish_complaint(event_type, instance), using=using)
+
+@receiver(post_delete, sender=Complaint)
+def update_aggregates_on_delete(sender, instance, using=None, **kwargs):
+  if _is_archiving():
+    return
+  adjust_complaint_aggregate(complaint_aggregate_key(_complaint_values(instance)), -1, using)
+
+@receiver(post_delete, sender=Complaint)
+def tombstone_deleted_complaint(sender, instance, using=None, **kwargs):
+  if _is_archiving():
+    return
+  with transaction.atomic(using=using):
+    ComplaintTombstone.objects.using(using).create(
+      unique_key=instance.unique_key,
+      account=instance.account,
+      council_dist=instance.council_dist,
+      change_seq=next_change_seq(using)
+    )
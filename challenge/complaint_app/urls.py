@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework import routers
-from .views import ComplaintViewSet, OpenCasesViewSet, ClosedCasesViewSet, TopComplaintTypeViewSet, ConstituentComplaintsViewSet
+from .views import ComplaintViewSet, OpenCasesViewSet, ClosedCasesViewSet, TopComplaintTypeViewSet, ConstituentComplaintsViewSet, ComplaintExportViewSet, ReportJobViewSet, HeatmapViewSet, SummaryViewSet, StreamTicketViewSet, complaint_stream
 
 router = routers.SimpleRouter()
 router.register(r'allComplaints', ComplaintViewSet, basename='complaint')
@@ -8,6 +8,12 @@ router.register(r'openCases', OpenCasesViewSet, basename='openCases')
 router.register(r'closedCases', ClosedCasesViewSet, basename='closedCases')
 router.register(r'topComplaints', TopComplaintTypeViewSet, basename='topComplaints')
 router.register(r'constituentComplaints', ConstituentComplaintsViewSet, basename='constituentComplaints')
+router.register(r'export', ComplaintExportViewSet, basename='export')
+router.register(r'heatmap', HeatmapViewSet, basename='heatmap')
+router.register(r'summary', SummaryViewSet, basename='summary')
+router.register(r'jobs', ReportJobViewSet, basename='jobs')
+router.register(r'streamTicket', StreamTicketViewSet, basename='streamTicket')
 urlpatterns = [
+  path('stream/', complaint_stream, name='stream'),
 ]
 urlpatterns += router.urls
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, router
+from complaint_app.models import Complaint, ChangeCounter
+from .change_utils import COMPLAINT_COUNTER, CACHE_EPOCH_COUNTER, get_cache_epoch
+from .string_utils import format_district_number
+from .query_utils import get_district_complaints
+from .summary_utils import get_district_summary, get_top_complaint_types
+
+logger = logging.getLogger(__name__)
+
+COUNCIL_MEMBERS_JSON = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'management', 'commands', 'councilMembers.json'
+)
+
+CACHE_FILTER_FIELDS = ('account', 'council_dist')
+
+def _serialized_list(filter_field, padded_district, case_status):
+    from complaint_app.serializers import ComplaintSerializer
+    complaints = get_district_complaints(filter_field, padded_district, case_status)
+    return list(ComplaintSerializer(complaints, many=True).data)
+
+# Cached per district: the dashboard's summary and top complaint types, and, with
+# settings.COMPLAINT_CACHE_LISTS, the default (unfiltered) complaint lists
+DISTRICT_RESULTS = {
+    'summary': get_district_summary,
+    'top_complaints': get_top_complaint_types,
+}
+DISTRICT_LIST_RESULTS = {
+    'all': lambda filter_field, padded_district: _serialized_list(filter_field, padded_district, 'all'),
+    'open': lambda filter_field, padded_district: _serialized_list(filter_field, padded_district, 'open'),
+    'closed': lambda filter_field, padded_district: _serialized_list(filter_field, padded_district, 'closed'),
+}
+
+def cached_district_results():
+    """
+    @return dict - The DISTRICT_RESULTS and, if enabled, DISTRICT_LIST_RESULTS entries
+    """
+    if settings.COMPLAINT_CACHE_LISTS:
+        return {**DISTRICT_RESULTS, **DISTRICT_LIST_RESULTS}
+    return DISTRICT_RESULTS
+
+def is_cache_process_local():
+    """
+    @return bool - Whether the complaint cache lives inside each process, so that what a
+        management command warms is gone when it exits
+    """
+    return isinstance(caches[settings.COMPLAINT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+def get_cache_version():
+    """
+    The version is global: a write in any district moves every district to new keys,
+    so a steady trickle of writes keeps the cache cold for districts that did not
+    change. That keeps invalidation to one counter read per request, which suits the
+    mostly-read, bulk-loaded complaint data.
+
+    @return str - "<epoch>.<change_seq>", which changes with every complaint write,
+        archive batch and aggregate rebuild
+    """
+    using = router.db_for_read(Complaint)
+    values = dict(ChangeCounter.objects.using(using)
+      .filter(name__in=(COMPLAINT_COUNTER, CACHE_EPOCH_COUNTER))
+      .values_list('name', 'value')
+    )
+    if CACHE_EPOCH_COUNTER not in values:
+        values[CACHE_EPOCH_COUNTER] = get_cache_epoch(using)
+    return f"{values[CACHE_EPOCH_COUNTER]}.{values.get(COMPLAINT_COUNTER, 0)}"
+
+def district_cache_key(kind, filter_field, padded_district, version):
+    return f"complaints:{kind}:{filter_field}:{padded_district}:{version}"
+
+def get_cached_district_result(kind, filter_field, padded_district):
+    """
+    A DISTRICT_RESULTS or DISTRICT_LIST_RESULTS entry for a district, from the
+    COMPLAINT_CACHE_ALIAS cache when it is cached (see cached_district_results).
+    Keys carry the change sequence, so any complaint write moves reads to fresh keys
+    and the stale entries simply expire.
+
+    @param kind - A DISTRICT_RESULTS or DISTRICT_LIST_RESULTS key
+    @param filter_field - 'account' or 'council_dist'
+    @param padded_district - District in NYCC format, e.g. "NYCC01"
+    """
+    results = cached_district_results()
+    if kind not in results:
+        return DISTRICT_LIST_RESULTS[kind](filter_field, padded_district)
+    cache = caches[settings.COMPLAINT_CACHE_ALIAS]
+    key = district_cache_key(kind, filter_field, padded_district, get_cache_version())
+    result = cache.get(key)
+    if result is None:
+        result = results[kind](filter_field, padded_district)
+        cache.set(key, result)
+    return result
+
+def get_council_districts():
+    """
+    @return list - Every council district from councilMembers.json in NYCC format, sorted
+    """
+    with open(COUNCIL_MEMBERS_JSON) as json_file:
+        return sorted({format_district_number(member['district']) for member in json.load(json_file)})
+
+def warm_district(padded_district):
+    """
+    Computes and caches every cached_district_results() entry of a district, in both
+    normal (account) and constituent (council_dist) mode.
+
+    @return float - Seconds taken
+    """
+    started = time.perf_counter()
+    cache = caches[settings.COMPLAINT_CACHE_ALIAS]
+    version = get_cache_version()
+    for filter_field in CACHE_FILTER_FIELDS:
+        for kind, compute in cached_district_results().items():
+            cache.set(district_cache_key(kind, filter_field, padded_district, version),
+                      compute(filter_field, padded_district))
+    return time.perf_counter() - started
+
+def _warm_district_in_thread(padded_district):
+    try:
+        return warm_district(padded_district)
+    finally:
+        # Each pool thread opened its own connections
+        connections.close_all()
+
+def warm_all_districts(workers=None, districts=None):
+    """
+    Warms the cache for every council district in parallel.
+
+    @param workers - Thread pool size, defaults to settings.WARM_CACHE_WORKERS
+    @param districts - Districts to warm, defaults to get_council_districts()
+
+    @return iterator - (padded_district, seconds) per district, in completion order
+    """
+    districts = get_council_districts() if districts is None else districts
+    executor = ThreadPoolExecutor(max_workers=workers or settings.WARM_CACHE_WORKERS)
+    futures = {executor.submit(_warm_district_in_thread, district): district for district in districts}
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def warm_cache_in_background():
+    """
+    Startup hook for backend.wsgi/backend.asgi: warms the cache on a daemon thread
+    so the worker starts serving immediately.
+    """
+    def warm():
+        started = time.perf_counter()
+        try:
+            count = sum(1 for _ in warm_all_districts())
+        except Exception:
+            logger.exception("Warming the complaint cache failed")
+            return
+        logger.info("Warmed the complaint cache for %d districts in %.2fs", count, time.perf_counter() - started)
+    thread = threading.Thread(target=warm, name='warm-complaint-cache', daemon=True)
+    thread.start()
+    return thread
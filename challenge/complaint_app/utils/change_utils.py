@@ -0,0 +1,93 @@
+import random
+from django.db import router, transaction
+from django.db.models import F, Q
+from complaint_app.models import Complaint, ChangeCounter, ComplaintTombstone
+from .query_utils import STATUS_FILTERS
+
+COMPLAINT_COUNTER = 'complaint'
+
+# Random per-database value in the cache keys and the interval index, so a different
+# database at the same change sequence (a restore, a fresh test database) never reads
+# another one's entries
+CACHE_EPOCH_COUNTER = 'cache_epoch'
+
+def reserve_change_seqs(count=1, using='default'):
+    """
+    Reserves count consecutive change sequence numbers. Called inside the writing
+    transaction, the counter row stays locked until commit, so numbers become
+    visible to readers in order.
+
+    @param count - How many numbers to reserve, e.g. the size of a bulk insert
+    @param using - Database alias to write to
+
+    @return range - The reserved sequence numbers
+    """
+    with transaction.atomic(using=using):
+        counters = ChangeCounter.objects.using(using)
+        if not counters.filter(name=COMPLAINT_COUNTER).update(value=F('value') + count):
+            counters.get_or_create(name=COMPLAINT_COUNTER)
+            counters.filter(name=COMPLAINT_COUNTER).update(value=F('value') + count)
+        last = counters.get(name=COMPLAINT_COUNTER).value
+    return range(last - count + 1, last + 1)
+
+def next_change_seq(using='default'):
+    return reserve_change_seqs(1, using)[0]
+
+def current_change_seq(using='default'):
+    """
+    @return int - The latest sequence number handed out, used as the next cursor
+    """
+    return ChangeCounter.objects.using(using).filter(name=COMPLAINT_COUNTER).values_list('value', flat=True).first() or 0
+
+def get_cache_epoch(using='default'):
+    """
+    @return int - The database's CACHE_EPOCH_COUNTER value, created on first use
+    """
+    value = ChangeCounter.objects.using(using).filter(name=CACHE_EPOCH_COUNTER).values_list('value', flat=True).first()
+    if value is None:
+        epoch, _ = ChangeCounter.objects.get_or_create(
+            name=CACHE_EPOCH_COUNTER, defaults={'value': random.getrandbits(62)}
+        )
+        value = epoch.value
+    return value
+
+def parse_cursor(cursor):
+    """
+    @param cursor - The ?since= value, a non-negative integer string
+    @return int - The parsed cursor
+    @raises ValueError - If the cursor is malformed
+    """
+    if not str(cursor).isdigit():
+        raise ValueError("since must be a cursor returned by a previous request, or 0")
+    return int(cursor)
+
+def get_changes_since(since, filter_field, padded_district, case_status='all'):
+    """
+    Collects what changed in a district list since a cursor.
+
+    @param since - Cursor from the previous poll
+    @param filter_field - 'account' or 'council_dist'
+    @param padded_district - District in NYCC format
+    @param case_status - STATUS_FILTERS key of the list being synced
+
+    @return tuple - (cursor, changed complaints queryset, removed unique_keys)
+        changed holds complaints inserted or updated into the list. removed holds
+        complaints that were deleted, moved to another district, or no longer match
+        case_status.
+    """
+    # Counter, complaints and tombstones must come from the same database, or a
+    # lagging replica could hand out a cursor past rows it has not received yet
+    using = router.db_for_read(Complaint)
+    cursor = current_change_seq(using)
+    in_range = Q(change_seq__gt=since, change_seq__lte=cursor)
+    district = Complaint.objects.using(using).filter(in_range, **{filter_field: padded_district})
+    status_filter = Q(**STATUS_FILTERS[case_status])
+
+    changed = district.filter(status_filter).order_by('change_seq')
+    removed = list(ComplaintTombstone.objects.using(using)
+      .filter(in_range, **{filter_field: padded_district})
+      .values_list('unique_key', flat=True)
+    )
+    if STATUS_FILTERS[case_status]:
+        removed += list(district.exclude(status_filter).values_list('unique_key', flat=True))
+    return cursor, changed, removed
@@ -0,0 +1,136 @@
+import csv
+import io
+from itertools import islice
+from .query_utils import COMPLAINT_FIELDS
+
+# Rows fetched from the database cursor (and written out) per chunk.
+# Keeps memory bounded no matter how many complaints are exported.
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+class ExportFormatUnavailable(Exception):
+    """Raised when an export format needs an optional library that is not installed."""
+
+def _iter_row_chunks(queryset, chunk_size):
+    """
+    Streams a queryset as tuples in COMPLAINT_FIELDS order, grouped into lists of chunk_size.
+    Uses .values_list().iterator() so model instances and the result cache are never built.
+    """
+    rows = queryset.order_by('id').values_list(*COMPLAINT_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_csv_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Encodes complaints as CSV, one bytes chunk per batch of rows, header first.
+
+    @param queryset - Complaint queryset to export
+    @param chunk_size - Number of rows per chunk
+
+    @return generator - Yields UTF-8 encoded CSV bytes
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COMPLAINT_FIELDS)
+    for chunk in _iter_row_chunks(queryset, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        # Header only, no rows matched
+        yield buffer.getvalue().encode('utf-8')
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever has been written since the last drain."""
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportFormatUnavailable("Parquet export requires the optional 'pyarrow' package")
+    return pyarrow
+
+def iter_parquet_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Encodes complaints as Parquet, writing one row group per batch of rows.
+    Requires the optional pyarrow package.
+
+    @param queryset - Complaint queryset to export
+    @param chunk_size - Number of rows per row group
+
+    @return generator - Yields Parquet file bytes, footer included in the last chunk
+    @raises ExportFormatUnavailable - If pyarrow is not installed
+    """
+    pa = _load_pyarrow()
+    schema = pa.schema([
+        (field, pa.date32() if field in ('opendate', 'closedate') else pa.string())
+        for field in COMPLAINT_FIELDS
+    ])
+
+    def generate():
+        sink = _ChunkSink()
+        writer = pa.parquet.ParquetWriter(sink, schema)
+        try:
+            for chunk in _iter_row_chunks(queryset, chunk_size):
+                columns = list(zip(*chunk))
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=schema.field(i).type) for i, column in enumerate(columns)],
+                    schema=schema
+                )
+                writer.write_batch(batch)
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    # Fail on a missing dependency before the caller starts streaming a response
+    return generate()
+
+EXPORT_WRITERS = {
+    'csv': iter_csv_chunks,
+    'parquet': iter_parquet_chunks,
+}
+
+def iter_export_chunks(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Dispatches to the chunked encoder for export_format ('csv' or 'parquet').
+
+    @raises ValueError - If the format is unknown
+    @raises ExportFormatUnavailable - If the format's optional library is missing
+    """
+    if export_format not in EXPORT_WRITERS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {', '.join(EXPORT_WRITERS)}")
+    return EXPORT_WRITERS[export_format](queryset, chunk_size)
@@ -0,0 +1,107 @@
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from complaint_app.models import Complaint, ArchivedComplaint, ComplaintAggregate
+from .query_utils import STATUS_FILTERS
+from .change_utils import reserve_change_seqs
+
+AGGREGATE_KEY_FIELDS = ('account', 'council_dist', 'zip', 'community_board', 'complaint_type')
+HEATMAP_LEVELS = ('zip', 'community_board')
+HEATMAP_SPLITS = ('complaint_type', 'status')
+
+def complaint_status(opendate, closedate):
+    """
+    @return str - 'open', 'closed' or '' (no dates), matching STATUS_FILTERS
+    """
+    if closedate is not None:
+        return 'closed'
+    if opendate is not None:
+        return 'open'
+    return ''
+
+def complaint_aggregate_key(values):
+    """
+    Maps a complaint (anything with the Complaint field names as keys) to its ComplaintAggregate key.
+
+    @param values - Dict of Complaint field values
+    @return dict - Lookup for the ComplaintAggregate row counting this complaint
+    """
+    key = {field: values.get(field) or "" for field in AGGREGATE_KEY_FIELDS}
+    key['status'] = complaint_status(values.get('opendate'), values.get('closedate'))
+    return key
+
+def adjust_complaint_aggregate(key, delta, using='default'):
+    """
+    Adds delta to the count of the aggregate row for key, creating the row if needed.
+    """
+    aggregates = ComplaintAggregate.objects.using(using)
+    if aggregates.filter(**key).update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic(using=using):
+            aggregates.create(count=delta, **key)
+    except IntegrityError:
+        # Another writer created the row first
+        aggregates.filter(**key).update(count=F('count') + delta)
+
+def rebuild_complaint_aggregates(using='default'):
+    """
+    Recomputes every ComplaintAggregate row from the Complaint and ArchivedComplaint
+    tables with one grouped query each. Needed after writes that skip model signals
+    (bulk_create, QuerySet.update).
+
+    @return int - Number of aggregate rows written
+    """
+    status = Case(
+        When(Q(**STATUS_FILTERS['closed']), then=Value('closed')),
+        When(Q(**STATUS_FILTERS['open']), then=Value('open')),
+        default=Value(''),
+        output_field=CharField()
+    )
+    counts = Counter()
+    for model in (Complaint, ArchivedComplaint):
+        grouped = (model.objects.using(using)
+          .annotate(
+            status=status,
+            **{f'key_{field}': Coalesce(field, Value(''), output_field=CharField()) for field in AGGREGATE_KEY_FIELDS}
+          )
+          .values('status', *(f'key_{field}' for field in AGGREGATE_KEY_FIELDS))
+          .annotate(total=Count('id'))
+          .order_by()
+        )
+        for row in grouped:
+            counts[(row['status'], *(row[f'key_{field}'] for field in AGGREGATE_KEY_FIELDS))] += row['total']
+
+    rows = [
+        ComplaintAggregate(status=key[0], count=count, **dict(zip(AGGREGATE_KEY_FIELDS, key[1:])))
+        for key, count in counts.items()
+    ]
+    with transaction.atomic(using=using):
+        ComplaintAggregate.objects.using(using).all().delete()
+        ComplaintAggregate.objects.using(using).bulk_create(rows, batch_size=1000)
+        # No complaint changed, but summaries did: move caches keyed on the sequence
+        reserve_change_seqs(1, using)
+    return len(rows)
+
+def get_heatmap(level, splits=(), filter_field=None, padded_district=None):
+    """
+    Sums the precomputed aggregates per location.
+
+    @param level - 'zip' or 'community_board'
+    @param splits - Extra group-by dimensions from HEATMAP_SPLITS
+    @param filter_field - 'account' or 'council_dist', None for council-wide
+    @param padded_district - District in NYCC format, None for council-wide
+
+    @return list - Dicts with the level, split values and 'count', largest first
+    """
+    aggregates = ComplaintAggregate.objects.all()
+    if filter_field is not None:
+        aggregates = aggregates.filter(**{filter_field: padded_district})
+    group_by = (level, *splits)
+    return list(aggregates
+      .values(*group_by)
+      .annotate(count=Sum('count'))
+      .filter(count__gt=0)
+      .order_by('-count', *group_by)
+    )
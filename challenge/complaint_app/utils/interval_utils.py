@@ -0,0 +1,175 @@
+import threading
+from bisect import bisect_right, insort
+from django.db import router
+from complaint_app.models import Complaint, ArchivedComplaint, ComplaintTombstone
+from .change_utils import current_change_seq, get_cache_epoch
+
+INTERVAL_FILTER_FIELDS = ('account', 'council_dist')
+INTERVAL_ROW_FIELDS = ('id', 'unique_key', *INTERVAL_FILTER_FIELDS, 'opendate', 'closedate')
+
+# Index entries are keyed by (table, primary key): unique_key is neither unique nor required
+HOT = 'complaint'
+ARCHIVE = 'archive'
+
+# Ids per IN (...) query, within every backend's parameter limit
+ID_QUERY_CHUNK = 500
+
+class DistrictIntervals:
+    """
+    A district's complaints as sorted open and close dates. The bisect position of a
+    date in each array is the prefix count of complaints opened/closed by that day.
+    """
+
+    def __init__(self):
+        self.opens = []
+        self.closes = []
+
+    def add(self, opendate, closedate):
+        insort(self.opens, opendate)
+        if closedate is not None:
+            insort(self.closes, closedate)
+
+    def remove(self, opendate, closedate):
+        del self.opens[bisect_right(self.opens, opendate) - 1]
+        if closedate is not None:
+            del self.closes[bisect_right(self.closes, closedate) - 1]
+
+    def open_count(self, as_of):
+        """
+        @param as_of - The day to count for
+        @return int - Complaints opened on or before as_of and not closed by then, in O(log n)
+        """
+        return bisect_right(self.opens, as_of) - bisect_right(self.closes, as_of)
+
+def _has_interval(opendate, closedate):
+    # Complaints without an open date, or closed before they opened, are never open
+    return opendate is not None and (closedate is None or closedate >= opendate)
+
+class OpenIntervalIndex:
+    """
+    In-process interval index answering "how many complaints were open in this district
+    on day X", hot and archived complaints alike. Built on first use, then kept current
+    by following the change sequence: each lookup first applies the complaints changed
+    and deleted since the last one, like the event relay does.
+
+    Every process that serves as_of lookups holds the dates of every complaint, about
+    two dates per complaint and district field.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._epoch = None
+            self._cursor = None
+            self._rows = {}
+            self._hot_ids_by_key = {}
+            self._districts = {}
+
+    def _district(self, filter_field, district):
+        return self._districts.setdefault((filter_field, district), DistrictIntervals())
+
+    def _add(self, key, row):
+        self._discard(key)
+        if not _has_interval(row['opendate'], row['closedate']):
+            return
+        self._rows[key] = row
+        if key[0] == HOT:
+            self._hot_ids_by_key.setdefault(row['unique_key'], set()).add(row['id'])
+        for filter_field in INTERVAL_FILTER_FIELDS:
+            self._district(filter_field, row[filter_field]).add(row['opendate'], row['closedate'])
+
+    def _discard(self, key):
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        if key[0] == HOT:
+            ids = self._hot_ids_by_key[row['unique_key']]
+            ids.discard(row['id'])
+            if not ids:
+                del self._hot_ids_by_key[row['unique_key']]
+        for filter_field in INTERVAL_FILTER_FIELDS:
+            self._district(filter_field, row[filter_field]).remove(row['opendate'], row['closedate'])
+
+    def _build(self, using, epoch):
+        self._rows = {}
+        self._hot_ids_by_key = {}
+        self._districts = {}
+        self._epoch = epoch
+        self._cursor = current_change_seq(using)
+        for row in Complaint.objects.using(using).values(*INTERVAL_ROW_FIELDS).iterator():
+            self._add((HOT, row['id']), row)
+        # Hot rows before archived ones: a complaint archived in between is then read
+        # twice rather than missed, and its archive copy is skipped here
+        archived = ArchivedComplaint.objects.using(using).values('complaint_id', *INTERVAL_ROW_FIELDS)
+        for row in archived.iterator():
+            if (HOT, row['complaint_id']) not in self._rows:
+                self._add((ARCHIVE, row['id']), row)
+
+    def _existing_ids(self, queryset, field, ids):
+        ids = list(ids)
+        existing = set()
+        for start in range(0, len(ids), ID_QUERY_CHUNK):
+            chunk = ids[start:start + ID_QUERY_CHUNK]
+            existing.update(queryset.filter(**{f'{field}__in': chunk}).values_list(field, flat=True))
+        return existing
+
+    def _apply_changes(self, using, current):
+        in_range = {'change_seq__gt': self._cursor, 'change_seq__lte': current}
+        changed = set()
+        for row in Complaint.objects.using(using).filter(**in_range).values(*INTERVAL_ROW_FIELDS).iterator():
+            self._add((HOT, row['id']), row)
+            changed.add(row['id'])
+        # Tombstones only name the unique_key, so check which indexed complaints with
+        # those keys are gone from the hot table. Moves changed the row again (applied
+        # above), and archiving writes no tombstone, but a deleted complaint sharing a
+        # key with an archived one is told apart by ArchivedComplaint.complaint_id
+        deleted_keys = set(ComplaintTombstone.objects.using(using)
+          .filter(**in_range)
+          .values_list('unique_key', flat=True)
+        )
+        candidates = {
+            complaint_id
+            for unique_key in deleted_keys
+            for complaint_id in self._hot_ids_by_key.get(unique_key, ())
+        } - changed
+        if candidates:
+            gone = candidates - self._existing_ids(Complaint.objects.using(using), 'id', candidates)
+            gone -= self._existing_ids(ArchivedComplaint.objects.using(using), 'complaint_id', gone)
+            for complaint_id in gone:
+                self._discard((HOT, complaint_id))
+        self._cursor = current
+
+    def refresh(self):
+        """
+        Brings the index up to date with the complaints database: a full build the first
+        time, or when the database was swapped or restored (a new epoch, or the change
+        counter went backwards), otherwise only the changes since the previous refresh.
+        """
+        # Always the same alias, for the counter and the rows alike: replicas picked at
+        # random lag by different amounts, and their counters would seem to go backwards
+        using = router.db_for_write(Complaint)
+        with self._lock:
+            epoch = get_cache_epoch(using)
+            current = current_change_seq(using)
+            if self._cursor is None or epoch != self._epoch or current < self._cursor:
+                self._build(using, epoch)
+            elif current > self._cursor:
+                self._apply_changes(using, current)
+
+    def open_counts(self, filter_field, padded_district, dates):
+        """
+        @param filter_field - 'account' or 'council_dist'
+        @param padded_district - District in NYCC format, e.g. "NYCC01"
+        @param dates - Days to count for
+
+        @return list - Dicts with 'date' and 'open', in the order of dates
+        """
+        self.refresh()
+        with self._lock:
+            intervals = self._districts.get((filter_field, padded_district), DistrictIntervals())
+            return [{'date': day, 'open': intervals.open_count(day)} for day in dates]
+
+open_interval_index = OpenIntervalIndex()
@@ -0,0 +1,66 @@
+import os
+import re
+from django.core import signing
+
+PROFILE_TOKEN_SALT = 'complaint_app.request_profiling'
+PROFILE_DUMP_SUFFIX = '.prof'
+
+def make_profile_token():
+    """
+    @return str - A signed value for the REQUEST_PROFILING_HEADER, valid for
+        REQUEST_PROFILING_TOKEN_MAX_AGE seconds
+    """
+    return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).sign('profile')
+
+def is_valid_profile_token(token, max_age):
+    try:
+        return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).unsign(token, max_age=max_age) == 'profile'
+    except signing.BadSignature:
+        return False
+
+def _label(value):
+    return re.sub(r'[^A-Za-z0-9]+', '-', value or '').strip('-') or 'none'
+
+def profile_dump_name(started, route, district, duration):
+    """
+    Dump file name carrying the labels profile_summary filters on, e.g.
+    "20240101T120000.123456_api-complaints-openCases_NYCC01_245ms_4121.prof".
+
+    @param started - datetime the request started
+    @param route - URL route of the request
+    @param district - District label, e.g. "NYCC01", or None
+    @param duration - Seconds the request took
+    """
+    return (
+        f"{started:%Y%m%dT%H%M%S.%f}_{_label(route)}_{_label(district)}"
+        f"_{duration * 1000:.0f}ms_{os.getpid()}{PROFILE_DUMP_SUFFIX}"
+    )
+
+def list_profile_dumps(directory):
+    """
+    @return list - Paths of the dumps in directory, oldest first
+    """
+    if not os.path.isdir(directory):
+        return []
+    # Names start with the timestamp, so they sort by age
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(PROFILE_DUMP_SUFFIX)
+    ]
+
+def rotate_profile_dumps(directory, max_files):
+    """
+    Deletes the oldest dumps beyond max_files.
+
+    @return int - Number of dumps deleted
+    """
+    dumps = list_profile_dumps(directory)
+    stale = dumps[:max(len(dumps) - max_files, 0)]
+    for path in stale:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another worker rotated it first
+            pass
+    return len(stale)
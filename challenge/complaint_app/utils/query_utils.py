@@ -0,0 +1,115 @@
+from datetime import date
+from django.db.models import Q
+from complaint_app.models import UserProfile, Complaint
+from .string_utils import format_district_number
+
+# Column order shared by the serializer-free code paths (exports, reports).
+# Matches ComplaintSerializer.Meta.fields.
+COMPLAINT_FIELDS = (
+    'unique_key', 'account', 'opendate', 'complaint_type', 'descriptor', 'zip',
+    'borough', 'city', 'council_dist', 'community_board', 'closedate'
+)
+
+# Open: has an open date, but no closing date
+# Closed: has a closing date
+STATUS_FILTERS = {
+    'all': {},
+    'open': {'opendate__isnull': False, 'closedate__isnull': True},
+    'closed': {'closedate__isnull': False},
+}
+
+# Most days one as_of= request may ask about, e.g. a year of daily backlog
+MAX_AS_OF_DATES = 366
+
+def get_district_filter(user, is_constituent=False):
+    """
+    Resolves which Complaint field and padded district value a user's queries filter on.
+    Mirrors the list endpoints: `account` by default, `council_dist` for constituent data.
+
+    @param user - The authenticated user, must have a UserProfile
+    @param is_constituent - Whether to filter by the constituents' district (council_dist)
+
+    @return tuple - (filter_field, padded_district), e.g. ('account', 'NYCC01')
+    @raises UserProfile.DoesNotExist - If the user has no profile
+    """
+    user_profile = UserProfile.objects.get(user=user)
+    padded_district = format_district_number(user_profile.district)
+    filter_field = 'council_dist' if is_constituent else 'account'
+    return filter_field, padded_district
+
+def get_district_complaints(filter_field, padded_district, case_status='all'):
+    """
+    Builds the Complaint queryset used by the district list endpoints.
+
+    @param filter_field - 'account' or 'council_dist'
+    @param padded_district - District in NYCC format, e.g. "NYCC01"
+    @param case_status - One of STATUS_FILTERS: 'all', 'open' or 'closed'
+
+    @return QuerySet - Unevaluated queryset of the matching complaints
+    @raises ValueError - If case_status is not a known status
+    """
+    if case_status not in STATUS_FILTERS:
+        raise ValueError(f"Unknown status '{case_status}', expected one of {', '.join(STATUS_FILTERS)}")
+    return Complaint.objects.filter(**{filter_field: padded_district}, **STATUS_FILTERS[case_status])
+
+def parse_complaint_fields(fields_param):
+    """
+    Parses a sparse fieldset parameter such as "unique_key,complaint_type,opendate".
+
+    @param fields_param - Comma separated Complaint field names
+    @return tuple - The requested fields, in COMPLAINT_FIELDS order
+    @raises ValueError - If the list is empty or names an unknown field
+    """
+    requested = {field.strip() for field in fields_param.split(',') if field.strip()}
+    unknown = requested - set(COMPLAINT_FIELDS)
+    if not requested or unknown:
+        raise ValueError(f"fields must be a comma separated list of: {', '.join(COMPLAINT_FIELDS)}")
+    return tuple(field for field in COMPLAINT_FIELDS if field in requested)
+
+def parse_opened_range(query_params):
+    """
+    Reads the optional opened_after / opened_before (YYYY-MM-DD, inclusive) list filters.
+
+    @param query_params - The request's query parameters
+    @return tuple - (opened_after, opened_before), each a date or None
+    @raises ValueError - If a date is malformed
+    """
+    bounds = []
+    for name in ('opened_after', 'opened_before'):
+        value = query_params.get(name)
+        try:
+            bounds.append(date.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+    return tuple(bounds)
+
+def filter_opened_range(queryset, opened_after=None, opened_before=None):
+    if opened_after is not None:
+        queryset = queryset.filter(opendate__gte=opened_after)
+    if opened_before is not None:
+        queryset = queryset.filter(opendate__lte=opened_before)
+    return queryset
+
+def parse_as_of(as_of_param, max_dates=MAX_AS_OF_DATES):
+    """
+    Parses a point-in-time parameter: one date, or comma separated dates for a backlog series.
+
+    @param as_of_param - YYYY-MM-DD dates, e.g. "2024-01-01,2024-02-01"
+    @param max_dates - Most dates accepted
+    @return tuple - The dates, in the given order
+    @raises ValueError - If a date is malformed, or there are none or too many
+    """
+    values = [value.strip() for value in as_of_param.split(',') if value.strip()]
+    if not values or len(values) > max_dates:
+        raise ValueError(f"as_of must be 1 to {max_dates} comma separated dates in YYYY-MM-DD format")
+    try:
+        return tuple(date.fromisoformat(value) for value in values)
+    except ValueError:
+        raise ValueError("as_of must be dates in YYYY-MM-DD format")
+
+def open_as_of_filter(as_of):
+    """
+    @param as_of - The day to look at
+    @return Q - Complaints that were open on that day: opened by then, and closed later or not at all
+    """
+    return Q(opendate__lte=as_of) & (Q(closedate__isnull=True) | Q(closedate__gt=as_of))
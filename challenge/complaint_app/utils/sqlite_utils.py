@@ -0,0 +1,62 @@
+import time
+
+# PRAGMAs applied to every new SQLite connection, selected by settings.SQLITE_PROFILE.
+# Kept free of Django imports so benchmarks/sqlite_concurrency.py can reuse them on raw connections.
+SQLITE_PRAGMA_PROFILES = {
+    # SQLite's own defaults: rollback journal, readers blocked while a writer commits
+    'default': {},
+    'production': {
+        # Readers no longer block on (or get blocked by) a writer
+        'journal_mode': 'WAL',
+        # Safe with WAL: only fsync at checkpoints, not on every commit
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        # 256 MiB of the database file memory-mapped
+        'mmap_size': 256 * 1024 * 1024,
+        # Negative means KiB: 64 MiB page cache per connection
+        'cache_size': -64 * 1024,
+        # No busy_timeout: the lock wait is the connection's own timeout, the
+        # DATABASES OPTIONS 'timeout', which this PRAGMA would silently override
+    },
+}
+
+def apply_sqlite_pragmas(connection, pragmas):
+    """
+    Runs `PRAGMA name = value` for each pragma on an open connection.
+
+    @param connection - A DB-API connection (sqlite3 or Django's wrapper's .connection)
+    @param pragmas - Mapping of pragma name to value, e.g. SQLITE_PRAGMA_PROFILES['production']
+    """
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+def is_locked_error(error):
+    """
+    @return bool - Whether an OperationalError means the database was locked or busy
+    """
+    message = str(error).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+def retry_on_locked(func, exceptions, attempts=5, backoff=0.1):
+    """
+    Calls func, retrying with exponential backoff while it fails because the
+    database is locked. func must be safe to repeat, e.g. a whole transaction.
+
+    @param func - Zero-argument callable to run
+    @param exceptions - Exception classes that may signal a lock (e.g. django.db.OperationalError)
+    @param attempts - Total number of tries before the error is re-raised
+    @param backoff - Seconds to wait before the first retry, doubled after each one
+
+    @return - Whatever func returns
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except exceptions as e:
+            if attempt == attempts or not is_locked_error(e):
+                raise
+            time.sleep(backoff * 2 ** (attempt - 1))
@@ -0,0 +1,24 @@
+from django.core import signing
+
+STREAM_TICKET_SALT = 'complaint_app.stream_ticket'
+
+def make_stream_ticket(user):
+    """
+    @param user - The authenticated user opening the event stream
+
+    @return str - A signed, timestamped ticket naming the user, for ?ticket= on the
+        stream URL in place of the permanent API token
+    """
+    return signing.TimestampSigner(salt=STREAM_TICKET_SALT).sign(str(user.pk))
+
+def get_stream_ticket_user_id(ticket, max_age):
+    """
+    @param ticket - A value from make_stream_ticket
+    @param max_age - Seconds the ticket stays valid
+
+    @return int or None - The user's id, or None if the ticket is forged or expired
+    """
+    try:
+        return int(signing.TimestampSigner(salt=STREAM_TICKET_SALT).unsign(ticket, max_age=max_age))
+    except (signing.BadSignature, ValueError):
+        return None
@@ -0,0 +1,49 @@
+from django.db.models import Sum
+from complaint_app.models import ComplaintAggregate
+from .interval_utils import open_interval_index
+
+def get_top_complaint_types(filter_field, padded_district, limit=3):
+    """
+    The district's most frequent complaint types, from ComplaintAggregate like the
+    summary counts, so archived complaints count here as well.
+
+    @param filter_field - 'account' or 'council_dist'
+    @param padded_district - District in NYCC format, e.g. "NYCC01"
+    @param limit - How many complaint types to return
+
+    @return list - Dicts with 'complaint_type' and 'count', most frequent first
+    """
+    return list(ComplaintAggregate.objects
+      .filter(**{filter_field: padded_district})
+      .exclude(complaint_type="")
+      .values('complaint_type')
+      .annotate(count=Sum('count'))
+      .filter(count__gt=0)
+      .order_by('-count', 'complaint_type')
+      [:limit]
+    )
+
+def get_district_summary(filter_field, padded_district, as_of=()):
+    """
+    Dashboard statistics for a district, read from the precomputed ComplaintAggregate
+    rows instead of the complaints table.
+
+    @param filter_field - 'account' or 'council_dist'
+    @param padded_district - District in NYCC format, e.g. "NYCC01"
+    @param as_of - Optional dates to also count the complaints open on, from the interval index
+
+    @return dict - total, open and closed counts plus the top 3 complaint types,
+        and 'open_as_of' when as_of is given
+    """
+    aggregates = ComplaintAggregate.objects.filter(**{filter_field: padded_district})
+    counts = dict(aggregates.values_list('status').annotate(count=Sum('count')).order_by())
+    summary = {
+        'district': padded_district,
+        'total': sum(counts.values()),
+        'open': counts.get('open', 0),
+        'closed': counts.get('closed', 0),
+        'top_complaints': get_top_complaint_types(filter_field, padded_district),
+    }
+    if as_of:
+        summary['open_as_of'] = open_interval_index.open_counts(filter_field, padded_district, as_of)
+    return summary
@@ -1,15 +1,88 @@
+import json
+import os
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets
-from .models import UserProfile, Complaint
-from .serializers import UserSerializer, UserProfileSerializer, ComplaintSerializer
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from .models import UserProfile, Complaint, ArchivedComplaint, ReportJob
+from .serializers import UserSerializer, UserProfileSerializer, ComplaintSerializer, ReportJobSerializer
 from rest_framework.response import Response
+from rest_framework.decorators import action
 from rest_framework import status
-from django.db.models import Count
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse, FileResponse, JsonResponse
+from .jobs import submit_job
+from .events import broadcaster, relay, district_channel
 from .utils.string_utils import format_district_number
+from .utils.query_utils import (
+  get_district_filter, get_district_complaints, parse_complaint_fields, parse_opened_range,
+  filter_opened_range, parse_as_of, open_as_of_filter, STATUS_FILTERS
+)
+from .utils.cache_utils import get_cached_district_result
+from .utils.archive_utils import wants_archive
+from .utils.change_utils import get_changes_since, parse_cursor
+from .utils.summary_utils import get_district_summary
+from .utils.heatmap_utils import get_heatmap, HEATMAP_LEVELS, HEATMAP_SPLITS
+from .utils.export_utils import iter_export_chunks, EXPORT_CONTENT_TYPES, ExportFormatUnavailable
+from .utils.stream_utils import make_stream_ticket, get_stream_ticket_user_id
 
 # Create your views here.
 
+def get_requested_fields(request):
+  # Sparse fieldsets: ?fields=unique_key,complaint_type,... (None when not given)
+  if 'fields' not in request.query_params:
+    return None
+  return parse_complaint_fields(request.query_params['fields'])
+
+def is_default_list_request(request):
+  # No filters, projections or cursors: the response warm_cache precomputes
+  return set(request.query_params) <= {'constituent', 'format'}
+
+def serialize_complaints(complaints, serializer_class, fields=None):
+  if fields is None:
+    return serializer_class(complaints, many=True).data
+  # Only the requested columns are selected, and no model instances are built
+  return serializer_class(complaints.values(*fields), many=True, fields=fields).data
+
+def complaint_list_response(request, complaints, serializer_class, archive_filters=None, include_archive=False):
+  # Optional ?opened_after= / ?opened_before= (YYYY-MM-DD) narrow the list by open date.
+  # Archived (old closed) complaints are appended when the range reaches back to them,
+  # with ?include_archive=true, or always with include_archive; archive_filters selects
+  # them, None if the list has none
+  try:
+    fields = get_requested_fields(request)
+    opened_after, opened_before = parse_opened_range(request.query_params)
+  except ValueError as e:
+    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+  complaints = filter_opened_range(complaints, opened_after, opened_before)
+  data = serialize_complaints(complaints, serializer_class, fields)
+
+  include_archive = include_archive or request.query_params.get('include_archive', '').lower() == 'true'
+  if archive_filters is not None and wants_archive(include_archive, opened_after, opened_before):
+    archived = filter_opened_range(ArchivedComplaint.objects.filter(**archive_filters), opened_after, opened_before)
+    data = data + serialize_complaints(archived, serializer_class, fields)
+  return Response(data, status=status.HTTP_200_OK)
+
+def changes_response(request, filter_field, padded_district, case_status, serializer_class):
+  # Delta sync: ?since=<cursor> returns only what changed in the list since that cursor.
+  # Start with since=0, then pass back the returned cursor on every poll.
+  try:
+    since = parse_cursor(request.query_params['since'])
+    fields = get_requested_fields(request)
+  except ValueError as e:
+    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+  cursor, changed, removed = get_changes_since(since, filter_field, padded_district, case_status)
+  return Response({
+    "cursor": str(cursor),
+    "changed": serialize_complaints(changed, serializer_class, fields),
+    "removed": removed,
+  }, status=status.HTTP_200_OK)
+
 class ComplaintViewSet(viewsets.ModelViewSet):
   http_method_names = ['get']
+  throttle_scope = 'heavy'
   serializer_class = ComplaintSerializer
   def list(self, request):
     # Get all complaints from the user's district
@@ -23,10 +96,16 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         filter_field = 'council_dist' if is_constituent else 'account'
         # END BONUS CHALLENGE
 
+        if 'since' in request.query_params:
+          return changes_response(request, filter_field, padded_district, 'all', self.serializer_class)
+
+        if is_default_list_request(request):
+          return Response(get_cached_district_result('all', filter_field, padded_district), status=status.HTTP_200_OK)
+
         complaints = Complaint.objects.filter(**{filter_field: padded_district})
 
-        serializer = self.serializer_class(complaints, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return complaint_list_response(request, complaints, self.serializer_class,
+          archive_filters={filter_field: padded_district})
 
     # Handle bad paths
     except UserProfile.DoesNotExist:
@@ -42,6 +121,7 @@ class ComplaintViewSet(viewsets.ModelViewSet):
 
 class OpenCasesViewSet(viewsets.ModelViewSet):
   http_method_names = ['get']
+  throttle_scope = 'heavy'
   serializer_class = ComplaintSerializer
   def list(self, request):
     # Get only the open complaints from the user's district
@@ -56,14 +136,32 @@ class OpenCasesViewSet(viewsets.ModelViewSet):
       filter_field = 'council_dist' if is_constituent else 'account'
       # END BONUS CHALLENGE
 
+      if 'since' in request.query_params:
+        return changes_response(request, filter_field, padded_district, 'open', self.serializer_class)
+
+      if 'as_of' in request.query_params:
+        # Point in time: the cases open on ?as_of=YYYY-MM-DD, including since closed
+        # and archived ones. The count alone is cheaper from summary/?as_of=
+        try:
+          as_of, = parse_as_of(request.query_params['as_of'], max_dates=1)
+        except ValueError as e:
+          return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        openAsOfCases = Complaint.objects.filter(open_as_of_filter(as_of), **{filter_field: padded_district})
+        return complaint_list_response(request, openAsOfCases, self.serializer_class,
+          archive_filters={filter_field: padded_district, 'opendate__lte': as_of, 'closedate__gt': as_of},
+          include_archive=True)
+
+      if is_default_list_request(request):
+        return Response(get_cached_district_result('open', filter_field, padded_district), status=status.HTTP_200_OK)
+
       openComplaintCases = Complaint.objects.filter(**{
         filter_field: padded_district,
         'opendate__isnull': False,
         'closedate__isnull': True
       })
 
-      serializer = self.serializer_class(openComplaintCases, many=True)
-      return Response(serializer.data, status=status.HTTP_200_OK)
+      # Only closed complaints are ever archived
+      return complaint_list_response(request, openComplaintCases, self.serializer_class)
 
     # Handle bad paths
     except UserProfile.DoesNotExist:
@@ -79,6 +177,7 @@ class OpenCasesViewSet(viewsets.ModelViewSet):
 
 class ClosedCasesViewSet(viewsets.ModelViewSet):
   http_method_names = ['get']
+  throttle_scope = 'heavy'
   serializer_class = ComplaintSerializer
   def list(self, request):
     # Get only complaints that are closed from the user's district
@@ -93,14 +192,20 @@ class ClosedCasesViewSet(viewsets.ModelViewSet):
       filter_field = 'council_dist' if is_constituent else 'account'
       # END BONUS CHALLENGE
 
+      if 'since' in request.query_params:
+        return changes_response(request, filter_field, padded_district, 'closed', self.serializer_class)
+
+      if is_default_list_request(request):
+        return Response(get_cached_district_result('closed', filter_field, padded_district), status=status.HTTP_200_OK)
+
       # Closed: Has no close date
       closedComplaintCases = Complaint.objects.filter(**{
         filter_field: padded_district,
         'closedate__isnull': False
       })
 
-      serializer = self.serializer_class(closedComplaintCases, many=True)
-      return Response(serializer.data, status=status.HTTP_200_OK)
+      return complaint_list_response(request, closedComplaintCases, self.serializer_class,
+        archive_filters={filter_field: padded_district})
 
     # Handle bad paths
     except UserProfile.DoesNotExist:
@@ -116,6 +221,7 @@ class ClosedCasesViewSet(viewsets.ModelViewSet):
 
 class TopComplaintTypeViewSet(viewsets.ModelViewSet):
   http_method_names = ['get']
+  throttle_scope = 'light'
   def list(self, request):
     # Get the top 3 complaint types from the user's district
     try:
@@ -129,16 +235,9 @@ class TopComplaintTypeViewSet(viewsets.ModelViewSet):
       # END BONUS CHALLENGE
 
       # Top 3 complaint case types
-      topComplaintCaseTypes = (Complaint.objects
-        .filter(**{filter_field: padded_district})
-        .values('complaint_type')
-        .annotate(count=Count('complaint_type'))
-        .order_by('-count')
-        .values('complaint_type', 'count')
-        [:3]
-      )
+      topComplaintCaseTypes = get_cached_district_result('top_complaints', filter_field, padded_district)
 
-      return Response(list(topComplaintCaseTypes), status=status.HTTP_200_OK)
+      return Response(topComplaintCaseTypes, status=status.HTTP_200_OK)
 
     # Handle bad paths
     except UserProfile.DoesNotExist:
@@ -154,6 +253,7 @@ class TopComplaintTypeViewSet(viewsets.ModelViewSet):
 # BONUS CHALLENGE EXTRA
 class ConstituentComplaintsViewSet(viewsets.ModelViewSet):
   http_method_names = ['get']
+  throttle_scope = 'heavy'
   serializer_class = ComplaintSerializer
   def list(self, request):
       # Get all complaints from the user's district for only their constituents who live in their district
@@ -164,13 +264,19 @@ class ConstituentComplaintsViewSet(viewsets.ModelViewSet):
         district_num = user_district if len(user_district) > 1 else f"0{user_district}"
         formatted_district = f"NYCC{district_num}"
 
+        if 'since' in request.query_params:
+          return changes_response(request, 'council_dist', formatted_district, 'all', self.serializer_class)
+
+        if is_default_list_request(request):
+          return Response(get_cached_district_result('all', 'council_dist', formatted_district), status=status.HTTP_200_OK)
+
         # Filter complaints by constituent's district (council_dist)
         complaintsByConstituents = Complaint.objects.filter(
             council_dist=formatted_district
         )
 
-        serializer = self.serializer_class(complaintsByConstituents, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return complaint_list_response(request, complaintsByConstituents, self.serializer_class,
+          archive_filters={'council_dist': formatted_district})
 
       # Handle bad paths
       except UserProfile.DoesNotExist:
@@ -184,3 +290,272 @@ class ConstituentComplaintsViewSet(viewsets.ModelViewSet):
               status=status.HTTP_500_INTERNAL_SERVER_ERROR
           )
 # END BONUS CHALLENGE
+
+class ComplaintExportViewSet(viewsets.ModelViewSet):
+  http_method_names = ['get']
+  throttle_scope = 'heavy'
+  def list(self, request):
+    # Stream the user's district as a file, straight from the database cursor in chunks
+    # Query params: file_format=csv|parquet, status=all|open|closed, constituent=true
+    try:
+      is_constituent = request.query_params.get('constituent', '').lower() == 'true'
+      filter_field, padded_district = get_district_filter(request.user, is_constituent)
+
+      export_format = request.query_params.get('file_format', 'csv').lower()
+      case_status = request.query_params.get('status', 'all').lower()
+      if export_format not in EXPORT_CONTENT_TYPES:
+        return Response(
+          {"error": f"Unsupported file_format, expected one of {', '.join(EXPORT_CONTENT_TYPES)}"},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+      if case_status not in STATUS_FILTERS:
+        return Response(
+          {"error": f"Unsupported status, expected one of {', '.join(STATUS_FILTERS)}"},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      complaints = get_district_complaints(filter_field, padded_district, case_status)
+      chunks = iter_export_chunks(complaints, export_format)
+
+      response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+      filename = f"complaints_{padded_district}_{filter_field}_{case_status}.{export_format}"
+      response['Content-Disposition'] = f'attachment; filename="{filename}"'
+      return response
+
+    # Handle bad paths
+    except UserProfile.DoesNotExist:
+        return Response(
+            {"error": "User profile not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except ExportFormatUnavailable as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    except Exception as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+class HeatmapViewSet(viewsets.ModelViewSet):
+  http_method_names = ['get']
+  throttle_scope = 'light'
+  def list(self, request):
+    # Complaint counts per zip or community board, served from the precomputed aggregates
+    # Query params: level=zip|community_board, split=complaint_type,status,
+    # constituent=true, scope=council (every district instead of the user's)
+    try:
+      level = request.query_params.get('level', 'zip')
+      splits = [split for split in request.query_params.get('split', '').split(',') if split]
+      if level not in HEATMAP_LEVELS:
+        return Response(
+          {"error": f"Unsupported level, expected one of {', '.join(HEATMAP_LEVELS)}"},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+      if any(split not in HEATMAP_SPLITS for split in splits):
+        return Response(
+          {"error": f"Unsupported split, expected any of {', '.join(HEATMAP_SPLITS)}"},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      if request.query_params.get('scope', '').lower() == 'council':
+        heatmap = get_heatmap(level, splits)
+      else:
+        is_constituent = request.query_params.get('constituent', '').lower() == 'true'
+        filter_field, padded_district = get_district_filter(request.user, is_constituent)
+        heatmap = get_heatmap(level, splits, filter_field, padded_district)
+
+      return Response(heatmap, status=status.HTTP_200_OK)
+
+    # Handle bad paths
+    except UserProfile.DoesNotExist:
+        return Response(
+            {"error": "User profile not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+class SummaryViewSet(viewsets.ModelViewSet):
+  http_method_names = ['get']
+  throttle_scope = 'light'
+  def list(self, request):
+    # Open/closed/total counts and top 3 complaint types, from the precomputed aggregates
+    # Query params: constituent=true, as_of=YYYY-MM-DD[,...] (open counts on those days)
+    try:
+      is_constituent = request.query_params.get('constituent', '').lower() == 'true'
+      filter_field, padded_district = get_district_filter(request.user, is_constituent)
+      try:
+        as_of = parse_as_of(request.query_params['as_of']) if 'as_of' in request.query_params else ()
+      except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+      if as_of:
+        summary = get_district_summary(filter_field, padded_district, as_of)
+      else:
+        summary = get_cached_district_result('summary', filter_field, padded_district)
+      return Response(summary, status=status.HTTP_200_OK)
+
+    # Handle bad paths
+    except UserProfile.DoesNotExist:
+        return Response(
+            {"error": "User profile not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+class ReportJobViewSet(viewsets.ModelViewSet):
+  # Submit heavy exports/reports to the background workers, poll them, download the result
+  http_method_names = ['get', 'post']
+  serializer_class = ReportJobSerializer
+
+  def get_queryset(self):
+    return ReportJob.objects.filter(user=self.request.user).order_by('-id')
+
+  def create(self, request):
+    kind = request.data.get('kind')
+    try:
+      if kind == ReportJob.KIND_EXPORT:
+        is_constituent = str(request.data.get('constituent', '')).lower() == 'true'
+        filter_field, padded_district = get_district_filter(request.user, is_constituent)
+        export_format = str(request.data.get('file_format', 'csv')).lower()
+        case_status = str(request.data.get('status', 'all')).lower()
+        if export_format not in EXPORT_CONTENT_TYPES or case_status not in STATUS_FILTERS:
+          return Response(
+            {"error": "Unsupported file_format or status"},
+            status=status.HTTP_400_BAD_REQUEST
+          )
+        params = {
+          'filter_field': filter_field,
+          'district': padded_district,
+          'file_format': export_format,
+          'status': case_status,
+        }
+      elif kind == ReportJob.KIND_COUNCIL_REPORT:
+        is_constituent = str(request.data.get('constituent', '')).lower() == 'true'
+        params = {'filter_field': 'council_dist' if is_constituent else 'account'}
+      else:
+        return Response(
+          {"error": f"Unsupported kind, expected one of {ReportJob.KIND_EXPORT}, {ReportJob.KIND_COUNCIL_REPORT}"},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      job = submit_job(kind, params, user=request.user)
+      return Response(self.serializer_class(job).data, status=status.HTTP_202_ACCEPTED)
+
+    # Handle bad paths
+    except UserProfile.DoesNotExist:
+        return Response(
+            {"error": "User profile not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+  @action(detail=True, methods=['get'])
+  def download(self, request, pk=None):
+    job = self.get_object()
+    if job.status == ReportJob.STATUS_EXPIRED:
+      return Response({"error": "Job result has expired"}, status=status.HTTP_410_GONE)
+    if job.status != ReportJob.STATUS_SUCCEEDED:
+      return Response({"error": f"Job is {job.status}"}, status=status.HTTP_409_CONFLICT)
+    try:
+      result_file = open(job.result_path, 'rb')
+    except FileNotFoundError:
+      # Deleted before expire_job_results got to it (another host, manual cleanup)
+      return Response({"error": "Job result is no longer available"}, status=status.HTTP_410_GONE)
+    return FileResponse(
+      result_file,
+      as_attachment=True,
+      filename=os.path.basename(job.result_path),
+      content_type=job.result_content_type
+    )
+
+def format_sse(event_type, data, event_id=None):
+  message = f"event: {event_type}\n"
+  if event_id is not None:
+    message += f"id: {event_id}\n"
+  return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+class StreamTicketViewSet(viewsets.ViewSet):
+  # EventSource cannot set headers, and the permanent API token must not end up in
+  # URLs (and so in server and proxy access logs): the stream takes a short-lived
+  # signed ticket in ?ticket= instead
+  http_method_names = ['post']
+  throttle_scope = 'light'
+
+  def create(self, request):
+    return Response(
+      {'ticket': make_stream_ticket(request.user), 'expires_in': settings.SSE_TICKET_MAX_AGE},
+      status=status.HTTP_201_CREATED
+    )
+
+def _authenticate_stream(request):
+  auth = get_authorization_header(request).split()
+  if len(auth) == 2 and auth[0].lower() == b'token':
+    user, _ = TokenAuthentication().authenticate_credentials(auth[1].decode())
+  else:
+    user_id = get_stream_ticket_user_id(request.GET.get('ticket', ''), settings.SSE_TICKET_MAX_AGE)
+    user = User.objects.filter(id=user_id, is_active=True).first() if user_id is not None else None
+    if user is None:
+      raise AuthenticationFailed("Invalid or expired stream ticket")
+  is_constituent = request.GET.get('constituent', '').lower() == 'true'
+  return get_district_filter(user, is_constituent)
+
+async def _complaint_events(subscription, filter_field, padded_district):
+  summary = sync_to_async(get_district_summary)
+  try:
+    yield format_sse('summary', await summary(filter_field, padded_district))
+    while True:
+      events = await subscription.next_events(timeout=settings.SSE_HEARTBEAT_INTERVAL)
+      if subscription.overflowed:
+        # Too far behind to catch up event by event; resync through ?since= instead
+        yield format_sse('resync', {})
+        return
+      if not events:
+        yield ": keepalive\n\n"
+        continue
+      for event in events:
+        yield format_sse(event['type'], event, event_id=event['change_seq'])
+      # One summary per burst of events, not per event
+      yield format_sse('summary', await summary(filter_field, padded_district))
+  finally:
+    broadcaster.unsubscribe(subscription)
+
+async def complaint_stream(request):
+  # Server-Sent Events: complaint.created, .closed and .updated for the caller's district,
+  # each burst followed by an updated summary. Authenticated by the Authorization header
+  # or ?ticket= from streamTicket/. Query params: constituent=true, ticket=<ticket>
+  if not isinstance(request, ASGIRequest):
+    return JsonResponse(
+      {"error": "The event stream requires an ASGI server (backend.asgi)"},
+      status=status.HTTP_501_NOT_IMPLEMENTED
+    )
+  try:
+    filter_field, padded_district = await sync_to_async(_authenticate_stream)(request)
+  except AuthenticationFailed as e:
+    return JsonResponse({"error": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+  except UserProfile.DoesNotExist:
+    return JsonResponse({"error": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+  subscription = broadcaster.subscribe([district_channel(filter_field, padded_district)])
+  relay.ensure_running()
+  response = StreamingHttpResponse(
+    _complaint_events(subscription, filter_field, padded_district),
+    content_type='text/event-stream'
+  )
+  response['Cache-Control'] = 'no-cache'
+  # Tell nginx-style proxies not to buffer the stream
+  response['X-Accel-Buffering'] = 'no'
+  return response
@@ -0,0 +1,20 @@
+"""
+Entry points for run_workers' spawned processes.
+
+Spawned children unpickle these functions by importing this module before Django
+is set up, so it must not import models at module level.
+"""
+import os
+
+def init_worker(settings_module):
+  os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+  import django
+  django.setup()
+
+def run_job(job_id):
+  from django.db import connections
+  from .jobs import execute_job
+  try:
+    return execute_job(job_id)
+  finally:
+    connections.close_all()